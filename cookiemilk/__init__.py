@@ -11,3 +11,19 @@ from .calc_surface_matching import *
 from .calc_graphical_matching import *
 from .get_data_files_name import *
 from .graph2prxfile import *
+from .aggregate_graphs import *
+from .text2graph_many import *
+from .async_runner import *
+from .scoring_server import *
+from .graph_fingerprint import *
+from .metric_cache import *
+from .deduplicate import *
+from .graph_index import *
+from .minhash import *
+from .calc_metrics_table import *
+from .prx_store import *
+from .calc_pairwise_matrix import *
+from .shared_cohort import *
+from .permutation_test import *
+from .calc_subset_metrics import *
+from .incremental_cohort import *
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import networkx as nx
+from .cmap2graph import *
+from .pathfinder_network import *
+from .text2graph import *
+
+
+def aggregate_graphs(
+        data,
+        keyterms,
+        data_type='graph',
+        pfnet=True,
+        threshold=0,
+        r=np.inf,
+        detailed=False,
+        **kwargs
+):
+    """
+    aggregate the knowledge structures of a group into one group-average graph.
+
+    participants are consumed one at a time, only a running mean, a running sum
+    of squared differences (Welford's algorithm) and a count matrix are kept, so
+    memory stays O(n*n) (n = number of key-terms) no matter how many
+    participants there are.
+
+    see:
+    Welford, B. P. (1962). Note on a method for calculating corrected sums of
+    squares and products. Technometrics, 4(3), 419-420.
+
+    :param data: an iterable (e.g., a list or a generator) of participants'
+    data. According to "data_type", each element is a NetworkX graph, a text (or
+    a file path of a text) or a concept map (or a file path of a concept map).
+    :param keyterms: a list contained some string variables, each string is one
+    key-term. Links between terms which are not in this list would be ignored.
+    :param data_type: "graph", "text", "pair" or "array". For "text", each
+    element is converted by "text2graph", for "pair" and "array", each element
+    is converted by "cmap2graph".
+    :param pfnet: converts the group-average network into a undirected PFNet if
+    set as True. The proportion of participants who linked two key-terms is
+    used as the similarity, and "1 - proportion" as the distance.
+    :param threshold: only links that linked by more than this proportion of
+    participants would be kept. Default is 0.
+    :param r: a parameter of pathfinder algorithm, see "text2graph".
+    :param detailed: show detailed information of calculation or not. Default is
+    False.
+    :param kwargs: other parameters passed to "text2graph" or "cmap2graph", e.g.,
+    synonym, encoding, read_from_file.
+    :return: a NetworkX graph represented the group knowledge structure. Each
+    edge has three attributes: "weight" (the proportion of participants linked
+    two key-terms), "variance" (the sample variance) and "count" (the number of
+    participants who have both key-terms).
+    """
+
+    assert data_type in ['graph', 'text', 'pair', 'array']
+
+    n = len(keyterms)
+    index = {term: i for i, term in enumerate(keyterms)}
+
+    count = np.zeros([n, n])
+    mean = np.zeros([n, n])
+    m2 = np.zeros([n, n])
+    participants = 0
+
+    for item in data:
+        if data_type == 'text':
+            item = text2graph(item, keyterms, **kwargs)
+        elif data_type in ['pair', 'array']:
+            item = cmap2graph(item, data_type, keyterms=keyterms, **kwargs)
+
+        # adjacency matrix of this participant, in the order of key-terms
+        present = np.zeros(n, dtype=bool)
+        present[[index[term] for term in item.nodes if term in index]] = True
+        x = np.zeros([n, n])
+        for u, v, w in item.edges(data='weight', default=1):
+            if u in index and v in index:
+                x[index[u], index[v]] = w
+                x[index[v], index[u]] = w
+
+        # update cells whose two key-terms both appear in this participant
+        valid = np.outer(present, present)
+        count += valid
+        delta = x - mean
+        mean += np.where(valid, delta / np.maximum(count, 1), 0)
+        m2 += np.where(valid, delta * (x - mean), 0)
+        participants += 1
+
+    variance = np.where(count > 1, m2 / np.maximum(count - 1, 1), 0)
+
+    if detailed:
+        print('participants:', participants)
+        print('\ncount matrix:\n', count)
+        print('\nmean matrix:\n', mean)
+        print('\nvariance matrix:\n', variance)
+
+    links = mean > threshold
+    np.fill_diagonal(links, False)
+
+    if pfnet:
+        # similarity --> distances, key-terms never linked are set as inf
+        dis = np.where(links, 1 - mean, np.inf)
+        links = floyd(dis, r=r)
+
+    G = nx.Graph()
+    G.add_nodes_from(keyterms)
+    G.graph['participants'] = participants
+
+    start, end = np.where(np.tril(links) == True)
+    for i in range(0, len(start)):
+        G.add_edge(keyterms[start[i]], keyterms[end[i]],
+                   weight=float(mean[start[i], end[i]]),
+                   variance=float(variance[start[i], end[i]]),
+                   count=int(count[start[i], end[i]]))
+
+    return G
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from functools import partial
+from os import cpu_count
+from .calc_gcent import *
+from .calc_graphical_matching import *
+from .calc_surface_matching import *
+from .calc_tversky import *
+from .pathfinder_network import *
+from .text2graph import *
+
+
+class AsyncRunner:
+    """
+    run functions of cookiemilk in an asyncio program without blocking the
+    event loop.
+
+    every call is sent to an executor, and at most "max_concurrency" calls are
+    running (or waiting in the executor) at the same time, other calls wait
+    until one of them is finished.
+
+    for example:
+    runner = AsyncRunner(ProcessPoolExecutor(4), max_concurrency=4)
+    G = await runner.text2graph(text, keyterms, read_from_file=False)
+    s1, s2 = await runner.gather(
+        runner.calc_tversky(G, expert, 'concept'),
+        runner.calc_tversky(G, expert, 'propositional'))
+    """
+
+    def __init__(self, executor=None, max_concurrency=None):
+        """
+        :param executor: a concurrent.futures executor. Default is None, which
+        means the default executor of the event loop (a thread pool). For long
+        texts or large matrices, a ProcessPoolExecutor is recommended, because
+        these calculations hold the GIL.
+        :param max_concurrency: maximum number of calls running at the same
+        time. Default is None, which means the number of CPUs.
+        """
+
+        self.executor = executor
+        self.max_concurrency = max_concurrency or cpu_count() or 1
+        self._semaphore = None
+
+    def _get_semaphore(self):
+        # created in the running event loop, see "asyncio.Semaphore"
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, func, *args, **kwargs):
+        """
+        run "func(*args, **kwargs)" in the executor.
+
+        :param func: a function. If the executor is a ProcessPoolExecutor,
+        then "func" and its arguments must be picklable.
+        :return: the return value of "func".
+        """
+
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(func, *args, **kwargs))
+
+    async def gather(self, *calls):
+        """
+        wait for a group of calls, e.g., runner.text2graph(...).
+
+        :return: a list of results, in the same order as "calls".
+        """
+
+        return list(await asyncio.gather(*calls))
+
+    async def map(self, func, iterable, **kwargs):
+        """
+        run "func(item, **kwargs)" for each item in "iterable".
+
+        items are taken from "iterable" only when there is a free slot, so a
+        long generator is not read into memory at once.
+
+        :return: a list of results, in the same order as "iterable".
+        """
+
+        results = {}
+        pending = set()
+
+        async def call(i, item):
+            results[i] = await self.run(func, item, **kwargs)
+
+        try:
+            for i, item in enumerate(iterable):
+                if len(pending) >= self.max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()  # raise the error (if any)
+                pending.add(asyncio.ensure_future(call(i, item)))
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return [results[i] for i in range(0, len(results))]
+
+    async def text2graph(self, text, keyterms, **kwargs):
+        """see "text2graph"."""
+        return await self.run(text2graph, text, keyterms, **kwargs)
+
+    async def floyd(self, dis, r=np.inf):
+        """see "floyd"."""
+        return await self.run(floyd, dis, r=r)
+
+    async def calc_tversky(self, graph1, graph2, comparison, alpha=0.5):
+        """see "calc_tversky"."""
+        return await self.run(calc_tversky, graph1, graph2, comparison,
+                              alpha=alpha)
+
+    async def calc_surface_matching(self, graph1, graph2):
+        """see "calc_surface_matching"."""
+        return await self.run(calc_surface_matching, graph1, graph2)
+
+    async def calc_graphical_matching(self, graph1, graph2):
+        """see "calc_graphical_matching"."""
+        return await self.run(calc_graphical_matching, graph1, graph2)
+
+    async def calc_gcent(self, G):
+        """see "calc_gcent"."""
+        return await self.run(calc_gcent, G)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import csv
+import networkx as nx
+from .calc_tversky import *
+from .graph_fingerprint import *
+from .numerical_sim import *
+
+# columns of the metrics table
+METRICS = ['concept', 'propositional', 'semantic', 'surface_matching',
+           'graphical_matching', 'gcent']
+
+
+def calc_metrics_table(
+        graphs,
+        reference,
+        alpha=0.5,
+        filename=None,
+        encoding='utf-8',
+        chunksize=1024
+):
+    """
+    calculate all metrics of many graphs against a reference graph (e.g., an
+    expert's graph) in a single pass.
+
+    the metrics are the concept, propositional and semantic similarity (see
+    "calc_tversky", graph as graph1 and reference as graph2), the surface
+    matching (see "calc_surface_matching"), the graphical matching (see
+    "calc_graphical_matching") and the gcent of each graph (see "calc_gcent").
+    Nodes, edges, the number of edges and the diameter of each graph are only
+    calculated once and shared by all metrics, and everything of the reference
+    graph is only calculated once for all graphs.
+
+    a metric is NaN if it can not be calculated for a graph, e.g., the
+    graphical matching of a disconnected graph.
+
+    :param graphs: an iterable (e.g., a list or a generator) of NetworkX graphs.
+    :param reference: a NetworkX graph.
+    :param alpha: the parameter "alpha" in the Tversky's similarity.
+    :param filename: if a filename is given, rows are written into a .csv file
+    as soon as they are calculated, rather than kept in memory.
+    :param encoding: encoding of the .csv file. Default is "utf-8".
+    :param chunksize: number of graphs calculated at a time.
+    :return: a NumPy structured array with a column "name" (name of each graph,
+    or its index if the graph has no name) and a column of each metric. If
+    "filename" is given, then None.
+    """
+
+    ref = _summary(reference)
+
+    writer = None
+    tables = []
+    f = None
+    if filename:
+        f = open(filename, 'w', encoding=encoding, newline='')
+        writer = csv.writer(f)
+        writer.writerow(['name'] + METRICS)
+
+    try:
+        chunk = []
+        start = 0
+        for G in graphs:
+            chunk.append(G)
+            if len(chunk) == chunksize:
+                tables.append(_flush(chunk, ref, alpha, start, writer))
+                start += len(chunk)
+                chunk = []
+        if chunk or not tables:
+            tables.append(_flush(chunk, ref, alpha, start, writer))
+    finally:
+        if f:
+            f.close()
+
+    if filename:
+        print(f'Metrics table is saved! File name is "{filename}".')
+        return None
+
+    return np.concatenate(tables)
+
+
+def _flush(chunk, ref, alpha, start, writer):
+    table = _metrics_chunk([_summary(G) for G in chunk], ref, alpha)
+    table['name'] = [G.name if G.name else str(start + i)
+                     for i, G in enumerate(chunk)]
+    if writer:
+        writer.writerows(table.tolist())
+        return table[:0]
+    return table
+
+
+def _summary(G):
+    """
+    everything of a graph needed by the metrics, which is calculated only once.
+    """
+
+    nodes, edges = graph_features(G)
+
+    try:
+        diameter = nx.diameter(G)
+    except (nx.NetworkXError, ValueError):  # a disconnected or empty graph
+        diameter = np.nan
+
+    # gcent, see "calc_gcent"
+    degree = dict.fromkeys(G.nodes, 0)
+    for u, v, w in G.edges(data='weight', default=1):
+        degree[u] += w
+        if u != v:
+            degree[v] += w
+    n = G.number_of_nodes()
+    if n > 2:
+        ncent = np.array(list(degree.values()), dtype=float) / (n - 1)
+        gcent = np.sum((np.max(ncent) - ncent) / (n - 2))
+    else:
+        gcent = np.nan
+
+    return {'nodes': nodes, 'edges': edges,
+            'edges_num': G.number_of_edges(), 'diameter': diameter,
+            'gcent': gcent}
+
+
+def _metrics_chunk(summaries, ref, alpha):
+    """
+    calculate metrics of graphs (see "_summary") against a reference graph.
+
+    :return: a NumPy structured array.
+    """
+
+    table = np.zeros(len(summaries),
+                     dtype=[('name', object)] + [(m, float) for m in METRICS])
+    if not summaries:
+        return table
+
+    def column(key):
+        return np.array([s[key] for s in summaries], dtype=float)
+
+    # Tversky's similarity
+    common_nodes = np.array([len(s['nodes'] & ref['nodes'])
+                             for s in summaries])
+    common_edges = np.array([len(s['edges'] & ref['edges'])
+                             for s in summaries])
+    nodes_num = np.array([len(s['nodes']) for s in summaries])
+    edges_num = column('edges_num')
+
+    concept, propositional, semantic = similarity_from_counts(
+        (common_nodes, nodes_num, len(ref['nodes'])),
+        (common_edges, edges_num, ref['edges_num']), alpha)
+
+    table['concept'] = concept
+    table['propositional'] = propositional
+    table['semantic'] = semantic
+    table['surface_matching'] = numerical_sim(edges_num, ref['edges_num'])
+    table['graphical_matching'] = numerical_sim(column('diameter'),
+                                                ref['diameter'])
+    table['gcent'] = column('gcent')
+
+    return table
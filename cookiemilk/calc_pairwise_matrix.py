@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from multiprocessing import Pool
+from .calc_tversky import *
+from .graph_fingerprint import *
+from .numerical_sim import *
+
+
+def calc_pairwise_matrix(
+        graphs,
+        filename,
+        comparison='propositional',
+        alpha=0.5,
+        block_size=1024,
+        processes=None,
+        resume=True,
+        dtype='float32'
+):
+    """
+    calculate the similarity between every pair of graphs into a .npy file,
+    for cohorts too large to keep the N*N matrix in memory.
+
+    the matrix is calculated block by block, each finished block is written
+    into the memory-mapped file, and its position is recorded in
+    "filename.done". If the calculation is interrupted, calling this function
+    again with the same parameters continues from the unfinished blocks.
+
+    :param graphs: a list of NetworkX graphs.
+    :param filename: file path of the .npy file.
+    :param comparison: "concept", "propositional", "semantic" (see
+    "calc_tversky", value(i, j) is the similarity with graphs[i] as graph1 and
+    graphs[j] as graph2) or "surface_matching" (see "calc_surface_matching").
+    A value is NaN if it can not be calculated, e.g., the propositional
+    similarity of two graphs without edges.
+    :param alpha: the parameter "alpha" in the Tversky's similarity.
+    :param block_size: number of rows (and columns) of a block.
+    :param processes: number of processes. Default is None, which means the
+    number of CPUs. If set as 1, then blocks are calculated in the current
+    process.
+    :param resume: if True and the file exists, then continue the calculation,
+    all other parameters must be the same as before. If False, then start
+    again.
+    :param dtype: data type of the matrix. Default is "float32".
+    :return: the matrix, a read-only NumPy memmap.
+    """
+
+    assert comparison in ['concept', 'propositional', 'semantic',
+                          'surface_matching']
+
+    n = len(graphs)
+    done_file = filename + '.done'
+
+    # the first line of "filename.done" is the settings, finished blocks are
+    # only valid with the same settings
+    settings = json.dumps({'n': n, 'comparison': comparison, 'alpha': alpha,
+                           'block_size': block_size,
+                           'dtype': np.dtype(dtype).str}, sort_keys=True)
+
+    done = set()
+    if resume and os.path.exists(filename) and os.path.exists(done_file):
+        with open(done_file, 'r') as f:
+            saved = f.readline().strip()
+            assert saved == settings, \
+                f'"{filename}" is calculated with different settings ' \
+                f'{saved}, set resume=False to start again'
+            for line in f:
+                if line.strip():
+                    done.add(tuple(int(i) for i in line.split()))
+    else:
+        matrix = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype,
+                                           shape=(n, n))
+        del matrix
+        with open(done_file, 'w') as f:
+            f.write(settings + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    blocks = [(i, j) for i in range(0, n, block_size)
+              for j in range(i, n, block_size) if (i, j) not in done]
+    features = [graph_features(G) for G in graphs]
+    initargs = (features, filename, comparison, alpha, block_size)
+
+    if blocks:
+        print(f'{len(done)} blocks are finished, {len(blocks)} blocks left.')
+
+    with open(done_file, 'a') as log:
+        if processes == 1:
+            _init_worker(*initargs)
+            finished = map(_calc_block, blocks)
+            pool = None
+        else:
+            pool = Pool(processes, initializer=_init_worker, initargs=initargs)
+            finished = pool.imap_unordered(_calc_block, blocks)
+        try:
+            for i, j in finished:
+                log.write(f'{i} {j}\n')
+                log.flush()
+                os.fsync(log.fileno())
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+    return np.load(filename, mmap_mode='r')
+
+
+# features of graphs and the output of each worker, see "_init_worker"
+_worker = {}
+
+
+def _init_worker(features, filename, comparison, alpha, block_size):
+    _worker['features'] = features
+    _worker['matrix'] = np.load(filename, mmap_mode='r+')
+    _worker['comparison'] = comparison
+    _worker['alpha'] = alpha
+    _worker['block_size'] = block_size
+
+
+def _calc_block(block):
+    """
+    calculate block (i, j) and block (j, i) of the matrix, and write them into
+    the file.
+    """
+
+    i, j = block
+    features = _worker['features']
+    matrix = _worker['matrix']
+    size = _worker['block_size']
+    comparison = _worker['comparison']
+    alpha = _worker['alpha']
+
+    rows = features[i:i + size]
+    cols = features[j:j + size]
+
+    matrix[i:i + len(rows), j:j + len(cols)] = \
+        _block_values(rows, cols, comparison, alpha)
+    if i != j:
+        matrix[j:j + len(cols), i:i + len(rows)] = \
+            _block_values(cols, rows, comparison, alpha)
+    matrix.flush()
+
+    return block
+
+
+def _common_counts(rows, cols):
+    """
+    number of shared items between every set in "rows" and every set in "cols",
+    by a product of incidence matrices of items in both "rows" and "cols".
+    """
+
+    vocabulary = set().union(*rows) & set().union(*cols)
+    index = {item: k for k, item in enumerate(vocabulary)}
+
+    def incidence(sets):
+        m = np.zeros([len(sets), len(index)], dtype=np.float32)
+        for k, s in enumerate(sets):
+            m[k, [index[item] for item in s if item in index]] = 1
+        return m
+
+    return incidence(rows) @ incidence(cols).T
+
+
+def _block_values(rows, cols, comparison, alpha):
+    """
+    calculate a block of the matrix, see "calc_pairwise_matrix".
+
+    :param rows: a list of (nodes, edges) of graphs, see "graph_features".
+    :param cols: another list.
+    :return: a NumPy array.
+    """
+
+    edges1 = np.array([len(f[1]) for f in rows], dtype=float)[:, None]
+    edges2 = np.array([len(f[1]) for f in cols], dtype=float)[None, :]
+
+    if comparison == 'surface_matching':
+        return numerical_sim(edges1, edges2)
+
+    nodes = edges = None
+    if comparison in ['concept', 'semantic']:
+        nodes1 = np.array([len(f[0]) for f in rows], dtype=float)[:, None]
+        nodes2 = np.array([len(f[0]) for f in cols], dtype=float)[None, :]
+        nodes = (_common_counts([f[0] for f in rows], [f[0] for f in cols]),
+                 nodes1, nodes2)
+    if comparison in ['propositional', 'semantic']:
+        edges = (_common_counts([f[1] for f in rows], [f[1] for f in cols]),
+                 edges1, edges2)
+
+    concept, propositional, semantic = similarity_from_counts(nodes, edges,
+                                                              alpha)
+
+    return {'concept': concept, 'propositional': propositional,
+            'semantic': semantic}[comparison]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .calc_metrics_table import METRICS
+from .calc_tversky import *
+from .graph_fingerprint import *
+from .numerical_sim import *
+
+# metrics of "calc_subset_metrics", the graphical matching needs the diameter
+# of each subgraph, which is not a matrix operation
+SUBSET_METRICS = [m for m in METRICS if m != 'graphical_matching']
+
+
+def calc_subset_metrics(
+        graphs,
+        reference,
+        subsets,
+        keyterms=None,
+        alpha=0.5,
+        chunksize=64
+):
+    """
+    calculate metrics of many graphs against a reference graph, restricted to
+    each of many subsets of key-terms, e.g., the key-terms of each chapter.
+
+    the metrics of a graph G and a subset S are the same as
+    "calc_metrics_table" of G.subgraph(S) against reference.subgraph(S), i.e.,
+    only nodes in S and edges between nodes in S are kept. Graphs are converted
+    into adjacency matrices only once, and all subsets are calculated together
+    by matrix products, rather than building every subgraph.
+
+    edges are undirected, and weights of edges are ignored.
+
+    :param graphs: a list of NetworkX graphs.
+    :param reference: a NetworkX graph.
+    :param subsets: a list of subsets, each subset is a list of key-terms.
+    :param keyterms: a list of key-terms. Default is None, which means all
+    nodes of all graphs and the reference graph. Nodes not in key-terms are not
+    in any subset.
+    :param alpha: the parameter "alpha" in the Tversky's similarity.
+    :param chunksize: number of graphs calculated at a time.
+    :return: a NumPy structured array of len(graphs)*len(subsets), with a
+    column of each metric (see "SUBSET_METRICS"), e.g., result['concept'][i, k]
+    is the concept similarity of graphs[i] in subsets[k]. A metric is NaN if it
+    can not be calculated, e.g., gcent of a subgraph with less than 3 nodes.
+    """
+
+    features = [graph_features(G) for G in graphs]
+    ref_features = graph_features(reference)
+    if keyterms is None:
+        keyterms = sorted(set(ref_features[0]).union(*[f[0] for f in features]))
+    index = {str(term): i for i, term in enumerate(keyterms)}
+    n = len(keyterms)
+
+    # K*n masks of subsets
+    masks = np.zeros([len(subsets), n], dtype=np.float32)
+    for k, subset in enumerate(subsets):
+        missing = {str(term) for term in subset} - index.keys()
+        assert not missing, f'{sorted(missing)} of subset {k} are not in ' \
+                            f'key-terms'
+        masks[k, [index[str(term)] for term in subset]] = 1
+
+    ref_nodes, ref_adjacency = _adjacency([ref_features], index)
+    ref_nodes_num, ref_edges_num, _, _ = _subset_counts(ref_nodes,
+                                                        ref_adjacency, masks)
+
+    table = np.zeros([len(graphs), len(subsets)],
+                     dtype=[(m, float) for m in SUBSET_METRICS])
+
+    for start in range(0, len(graphs), chunksize):
+        nodes, adjacency = _adjacency(features[start:start + chunksize], index)
+        nodes_num, edges_num, degree_sum, degree_max = \
+            _subset_counts(nodes, adjacency, masks)
+        common_nodes = (nodes * ref_nodes) @ masks.T
+        _, common_edges, _, _ = _subset_counts(nodes, adjacency * ref_adjacency,
+                                               masks)
+
+        concept, propositional, semantic = similarity_from_counts(
+            (common_nodes, nodes_num, ref_nodes_num),
+            (common_edges, edges_num, ref_edges_num), alpha)
+
+        # gcent = sum((max(ncent) - ncent(i))/(n - 2)), ncent = degree/(n - 1),
+        # see "calc_gcent"
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gcent = (nodes_num * degree_max - degree_sum) / \
+                    ((nodes_num - 1) * (nodes_num - 2))
+        gcent = np.where(nodes_num > 2, gcent, np.nan)
+
+        rows = table[start:start + len(nodes)]
+        rows['concept'] = concept
+        rows['propositional'] = propositional
+        rows['semantic'] = semantic
+        rows['surface_matching'] = numerical_sim(edges_num, ref_edges_num)
+        rows['gcent'] = gcent
+
+    return table
+
+
+def _adjacency(features, index):
+    """
+    :param features: a list of (nodes, edges), see "graph_features".
+    :param index: a dict, key-term --> index.
+    :return: N*n float32 array of nodes, and N*n*n symmetric float32
+    adjacency matrices, a self-loop is 1 on the diagonal.
+    """
+
+    n = len(index)
+    nodes = np.zeros([len(features), n], dtype=np.float32)
+    adjacency = np.zeros([len(features), n, n], dtype=np.float32)
+
+    for g, (node_set, edge_set) in enumerate(features):
+        nodes[g, [index[node] for node in node_set if node in index]] = 1
+        pairs = np.array([(index[u], index[v]) for u, v in edge_set
+                          if u in index and v in index], dtype=int)
+        if len(pairs):
+            adjacency[g, pairs[:, 0], pairs[:, 1]] = 1
+            adjacency[g, pairs[:, 1], pairs[:, 0]] = 1
+
+    return nodes, adjacency
+
+
+def _subset_counts(nodes, adjacency, masks):
+    """
+    count nodes and edges of every graph in every subset.
+
+    :param nodes: N*n array of nodes, see "_adjacency".
+    :param adjacency: N*n*n adjacency matrices.
+    :param masks: K*n masks of subsets.
+    :return: N*K arrays of the number of nodes, the number of edges, the sum
+    of degrees and the max degree of nodes in each subset.
+    """
+
+    N, n, _ = adjacency.shape
+
+    # degree(g, i, k) = number of neighbours of node i in subset k
+    degree = (adjacency.reshape(N * n, n) @ masks.T).reshape(N, n, -1)
+    degree_sum = np.einsum('gik,ki->gk', degree, masks)
+
+    # every edge is counted twice in the sum of degrees, except self-loops
+    loops = np.einsum('gii->gi', adjacency) @ masks.T
+    edges_num = (degree_sum + loops) / 2
+
+    inside = nodes[:, :, None] * masks.T[None, :, :] > 0
+    degree_max = np.max(np.where(inside, degree, -np.inf), axis=1,
+                        initial=-np.inf)
+
+    return nodes @ masks.T, edges_num, degree_sum, degree_max
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import numpy as np
+
+
 def calc_tversky(
         graph1,
         graph2,
@@ -100,9 +103,6 @@ def propositional(graph1, graph2, alpha, detailed=False):
     for i in range(0, len(edges2)):
         edges2[i] = {edges2[i][0], edges2[i][1]}
 
-    print(edges1)
-    print(edges2)
-
     intersection = []
     for e1 in edges1:
         for e2 in edges2:
@@ -127,10 +127,6 @@ def propositional(graph1, graph2, alpha, detailed=False):
         if not check:
             dif_graph2.append(e2)
 
-    print('intersection: ', intersection)
-    print('dif_graph1: ', dif_graph1)
-    print('dif_graph2: ', dif_graph2)
-
     if detailed:
         print(f"\033[4m\033[36m\nCalculating Tversky's similarity in ratio "
               f"scales\033[0m")
@@ -201,3 +197,66 @@ def tversky(set1, set2, alpha=0.5):
     s = float('%.4f' % s)
 
     return s
+
+
+def tversky_from_counts(common, size1, size2, alpha=0.5):
+    """
+    calculation of Tversky's similarity from the sizes of sets, which is the
+    same as "tversky" (without rounding), but also works with NumPy arrays.
+
+    :param common: size of (set1 & set2).
+    :param size1: size of set1.
+    :param size2: size of set2.
+    :param alpha: the parameter "alpha" in Tversky's similarity.
+    :return: a number (or an array) of similarity. The similarity of two empty
+    sets is 1.
+    """
+
+    common = np.asarray(common, dtype=float)
+    size1 = np.asarray(size1, dtype=float)
+    size2 = np.asarray(size2, dtype=float)
+    beta = 1 - alpha
+
+    # (set1 & set2) + alpha*(set1 - set2) + beta*(set2 - set1)
+    denominator = common + alpha * (size1 - common) + beta * (size2 - common)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(denominator > 0, common / denominator,
+                     np.where(size1 + size2 == 0, 1.0, 0.0))
+
+    return s if s.ndim else float(s)
+
+
+def similarity_from_counts(nodes=None, edges=None, alpha=0.5):
+    """
+    calculation of the concept, propositional and semantic similarity from the
+    sizes of sets, which also works with NumPy arrays. The concept similarity
+    is rounded (see "tversky"), the propositional similarity of two graphs
+    without edges is NaN, and the semantic similarity is NaN if the concept
+    similarity is 0, since they can not be calculated by "calc_tversky".
+
+    :param nodes: (common, size1, size2) of nodes, see "tversky_from_counts".
+    Default is None, which means the concept and semantic similarity are not
+    calculated.
+    :param edges: (common, size1, size2) of edges. Default is None, which means
+    the propositional and semantic similarity are not calculated.
+    :param alpha: the parameter "alpha" in Tversky's similarity.
+    :return: the concept, propositional and semantic similarity, each is a
+    number, an array, or None if it is not calculated.
+    """
+
+    concept = propositional = semantic = None
+
+    if nodes is not None:
+        concept = np.round(tversky_from_counts(*nodes, alpha), 4)
+
+    if edges is not None:
+        _, size1, size2 = edges
+        propositional = np.where(np.add(size1, size2) > 0,
+                                 tversky_from_counts(*edges, alpha), np.nan)
+
+    if concept is not None and propositional is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            semantic = np.where(concept > 0, propositional / concept, np.nan)
+
+    return tuple(s if s is None or np.ndim(s) else float(s)
+                 for s in (concept, propositional, semantic))
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import csv
+import json
+import os
+import pickle
+import sys
+from hashlib import sha1
+from multiprocessing import Pool
+import numpy as np
+from .calc_metrics_table import METRICS, _metrics_chunk, _summary
+from .cmap2graph import *
+from .deduplicate import input_fingerprint
+from .get_data_files_name import *
+from .graph_fingerprint import graph_fingerprint
+from .text2graph import _compile_keyterms, _text2graph_compiled
+
+# settings and compiled key-terms of each worker process, see "_init_worker"
+_worker = {}
+
+
+def main(argv=None):
+    """
+    the "cookiemilk" command, which scores every data file in a directory
+    against a reference graph, e.g.,
+    cookiemilk data/ --keyterms keyterms.txt --reference expert.txt -o out.csv
+    see "cookiemilk --help".
+
+    :param argv: a list of command-line arguments. Default is None, which means
+    sys.argv[1:].
+    :return: exit status, 0 if every file is scored, otherwise 1.
+    """
+
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.reference_type is None:
+        args.reference_type = args.data_type
+
+    if not args.keyterms and {args.data_type, args.reference_type} != {'pair'}:
+        parser.error('"--keyterms" is required for the data type "text" and '
+                     '"array"')
+
+    settings = {'data_type': args.data_type,
+                'keyterms': _read_lines(args.keyterms, args.encoding)
+                if args.keyterms else None,
+                'synonym': _read_synonym(args.synonym, args.encoding)
+                if args.synonym else None,
+                'encoding': args.encoding,
+                'as_lower': not args.case_sensitive,
+                'read_from': args.read_from,
+                'pfnet': args.pfnet,
+                'max': args.max,
+                'min': args.min,
+                'r': args.r}
+    # the cached results of a file are used only if settings are the same
+    settings['key'] = sha1(json.dumps(settings, sort_keys=True).encode(
+        'utf-8')).hexdigest()
+    settings['cache'] = args.cache
+    if args.cache:
+        os.makedirs(args.cache, exist_ok=True)
+
+    _init_worker(dict(settings, data_type=args.reference_type))
+    reference = _load(args.reference)
+    ref = _summary(reference)
+
+    # the first line of "OUTPUT.settings" is the settings of the output, rows of
+    # the output are only valid with the same settings
+    settings_file = args.output + '.settings'
+    output_settings = json.dumps({'key': settings['key'], 'alpha': args.alpha,
+                                  'reference': graph_fingerprint(reference)},
+                                 sort_keys=True)
+
+    files = sorted(get_data_files_name(args.directory))
+    names = [os.path.splitext(os.path.relpath(file, args.directory))[0]
+             .replace(os.sep, '/') for file in files]
+
+    done = set()
+    if args.resume and os.path.exists(args.output):
+        with open(args.output, 'r', encoding='utf-8', newline='') as f:
+            rows = csv.reader(f)
+            header = next(rows, None)
+            if header:
+                assert header == ['name'] + METRICS, \
+                    f'"{args.output}" is not a table of cookiemilk'
+                done = {row[0] for row in rows if row}
+    todo = [(file, name) for file, name in zip(files, names)
+            if name not in done]
+    if done:
+        saved = None
+        if os.path.exists(settings_file):
+            with open(settings_file, 'r', encoding='utf-8') as f:
+                saved = f.readline().strip()
+        assert saved == output_settings, \
+            f'"{args.output}" is scored with different settings, reference ' \
+            f'or alpha, use "--no-resume" to score every file again'
+        print(f'{len(files) - len(todo)} files are scored, {len(todo)} files '
+              f'left.')
+
+    append = args.resume and bool(done)
+    failed = 0
+    with open(args.output, 'a' if append else 'w', encoding='utf-8',
+              newline='') as f:
+        writer = csv.writer(f)
+        if not append:
+            with open(settings_file, 'w', encoding='utf-8') as out:
+                out.write(output_settings + '\n')
+            writer.writerow(['name'] + METRICS)
+            f.flush()
+
+        if args.jobs == 1:
+            _init_worker(settings)
+            results = map(_convert, todo)
+            pool = None
+        else:
+            pool = Pool(args.jobs or None, initializer=_init_worker,
+                        initargs=(settings,))
+            results = pool.imap(_convert, todo, chunksize=args.chunksize)
+
+        try:
+            chunk = []
+            for name, summary, error in results:
+                if error:
+                    print(f'Failed to score "{name}": {error}', file=sys.stderr)
+                    failed += 1
+                    continue
+                chunk.append((name, summary))
+                if len(chunk) == args.chunksize:
+                    _write(writer, f, chunk, ref, args.alpha)
+                    chunk = []
+            _write(writer, f, chunk, ref, args.alpha)
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+    print(f'{len(todo) - failed} files are scored! File name is '
+          f'"{args.output}".')
+
+    return 1 if failed else 0
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='cookiemilk',
+        description='score knowledge structures of every file in a directory '
+                    'against a reference graph, and write the metrics of each '
+                    'file into a .csv file.')
+    parser.add_argument('directory',
+                        help='directory of data files, sub-directories are '
+                             'included. Each file is a participant, named by '
+                             'its path in the directory without extension.')
+    parser.add_argument('-k', '--keyterms',
+                        help='a .txt file of key-terms, one key-term per '
+                             'line. Required for the data type "text" and '
+                             '"array".')
+    parser.add_argument('-s', '--synonym',
+                        help='a .txt file of synonyms, each line is a '
+                             'key-term and its synonyms, separated by tabs.')
+    parser.add_argument('-R', '--reference', required=True,
+                        help='a data file of the reference graph, e.g., an '
+                             'expert\'s essay or concept map.')
+    parser.add_argument('-t', '--data-type', default='text',
+                        choices=['text', 'pair', 'array'],
+                        help='type of data files, see "text2graph" and '
+                             '"cmap2graph". Default is "text".')
+    parser.add_argument('--reference-type', choices=['text', 'pair', 'array'],
+                        help='type of the reference file. Default is the same '
+                             'as "--data-type".')
+    parser.add_argument('-o', '--output', required=True,
+                        help='the .csv file of metrics.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of processes, 0 means the number of '
+                             'CPUs. Default is 1.')
+    parser.add_argument('-c', '--cache',
+                        help='a directory to cache graphs of files, so that '
+                             'unchanged files are not converted again.')
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                        help='score every file again. By default, files '
+                             'already in the output are skipped, so an '
+                             'interrupted run can be continued with the same '
+                             'settings (saved in "OUTPUT.settings").')
+    parser.add_argument('-a', '--alpha', type=float, default=0.5,
+                        help='the parameter "alpha" in the Tversky\'s '
+                             'similarity. Default is 0.5.')
+    parser.add_argument('--pfnet', action='store_true',
+                        help='convert data into PFNets.')
+    parser.add_argument('--max', type=float,
+                        help='see "text2graph" and "cmap2graph".')
+    parser.add_argument('--min', type=float,
+                        help='see "text2graph" and "cmap2graph".')
+    parser.add_argument('-r', type=float, default=np.inf,
+                        help='the parameter "r" of PFNets. Default is inf.')
+    parser.add_argument('--read-from', type=int, default=0,
+                        help='from which row (line) to read concept maps and '
+                             'matrices. Default is 0.')
+    parser.add_argument('--case-sensitive', action='store_true',
+                        help='do not convert texts into lower case.')
+    parser.add_argument('--encoding', default='utf-8',
+                        help='encoding of all files. Default is "utf-8".')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='number of files written into the output at a '
+                             'time. Default is 64.')
+    return parser
+
+
+def _read_lines(filename, encoding):
+    with open(filename, 'r', encoding=encoding) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _read_synonym(filename, encoding):
+    synonym = {}
+    for line in _read_lines(filename, encoding):
+        terms = [term.strip() for term in line.split('\t') if term.strip()]
+        synonym.setdefault(terms[0], []).extend(terms[1:])
+    return synonym
+
+
+def _init_worker(settings):
+    _worker['settings'] = settings
+    if settings['data_type'] == 'text':
+        _worker['state'] = _compile_keyterms(settings['keyterms'],
+                                             settings['synonym'])
+
+
+def _load(file):
+    """
+    convert a data file into a graph, see "text2graph" and "cmap2graph".
+    """
+
+    settings = _worker['settings']
+    if settings['data_type'] == 'text':
+        return _text2graph_compiled(file, _worker['state'], True, None,
+                                    settings['encoding'], settings['as_lower'],
+                                    settings['pfnet'], settings['max'],
+                                    settings['min'], settings['r'])
+
+    return cmap2graph(file, settings['data_type'], settings['keyterms'], True,
+                      settings['encoding'], settings['read_from'],
+                      settings['pfnet'], settings['max'], settings['min'],
+                      settings['r'])
+
+
+def _convert(task):
+    """
+    :return: (name, summary of the graph (see "_summary"), error message).
+    """
+
+    file, name = task
+    settings = _worker['settings']
+
+    try:
+        cache_file = None
+        if settings['cache']:
+            key = sha1((input_fingerprint(file) + settings['key']).encode(
+                'utf-8')).hexdigest()
+            cache_file = os.path.join(settings['cache'], key + '.pickle')
+            if os.path.exists(cache_file):
+                with open(cache_file, 'rb') as f:
+                    return name, pickle.load(f), None
+
+        summary = _summary(_load(file))
+
+        if cache_file:
+            # write a complete file at once, so that an interrupted run never
+            # leaves a broken cache
+            tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(summary, f)
+            os.replace(tmp_file, cache_file)
+
+        return name, summary, None
+    except Exception as e:
+        return name, None, f'{type(e).__name__}: {e}'
+
+
+def _write(writer, f, chunk, ref, alpha):
+    """
+    calculate and write rows of a chunk of files.
+    """
+
+    if not chunk:
+        return
+
+    table = _metrics_chunk([summary for name, summary in chunk], ref, alpha)
+    table['name'] = [name for name, summary in chunk]
+    writer.writerows(table.tolist())
+    f.flush()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
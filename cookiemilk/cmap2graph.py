@@ -4,6 +4,7 @@
 import networkx as nx
 from os.path import basename
 from .pathfinder_network import *
+from .pathfinder_network import _to_distance
 from .read_file import *
 
 
@@ -17,7 +18,8 @@ def cmap2graph(
         pfnet=False,
         max=None,
         min=None,
-        r=np.inf):
+        r=np.inf,
+        dtype='float64'):
     """
     convert the concept map (or proximity/adjacency matrix) into a graph.
 
@@ -56,6 +58,9 @@ def cmap2graph(
     see "Schvaneveldt, R. W., Durso, F. T., & Dearhold, D. W. (1989). Network
     structures in proximity data. Psychology of Learning and Motivation, 24,
     249-284".
+    :param dtype: data type of the matrix and the PFNet calculation, e.g.,
+    "float32" or "int8" (for integer data, if "max" and "min" are integers), see
+    "floyd". Default is "float64".
     :return: a NetworkX graph represented the Knowledge Structure network.
     """
 
@@ -77,75 +82,82 @@ def cmap2graph(
         content = list(file)
 
     # Step 2: find data by index (i.e., the parameter 'read_from'), skip the unwanted content
+    content = _select_rows(content, read_from)
+
+    if data_type == 'array':
+        array = _content2array(content, dtype)
+        _array2graph(array, keyterms, G, pfnet, max, min, r, inplace=True)
+    elif data_type == 'pair':
+        for pair in content:
+            G.add_edge(pair[0], pair[1])
+
+    return G
+
+
+def _select_rows(content, read_from):
+    """
+    skip the unwanted rows, see "read_from" in "cmap2graph".
+    """
+
     if type(read_from) == int:
         content = content[read_from:]
     elif type(read_from) in [tuple, list]:
         content = content[read_from[0]:read_from[1]]
-    if data_type == 'array':
-        # Step 3-1: convert the triangle matrix to a n*n matrix (if necessary)
-        # this means a triangle matrix
-        # add first row, this is m[0, 0]
-        # add elements in each row until the number of elements equal to n
-        print(content)
-        print('len(content[0]) & len(content[-1])', len(content[0]), len(content[-1]))
-        if len(content[0]) != len(content[-1]):
-            print('convert it into n*n array')
-            content.insert(0, ['0'])
-            for i in range(0, len(content)):
-                while len(content[i]) != len(content):
-                    content[i].append('')
-
-            print('content', content)
-
-            # Step 3-2: add value
-            # for each element m[i, j]
-            # for each element in the diagonal line
-            # for each element in the upper part of the triangle
-            for i in range(0, len(content)):
-                for j in range(0, len(content)):
-                    if i == j:
-                        content[i][j] = '0'
-                    elif i < j:
-                        content[i][j] = content[j][i]
-
-            print('content', content)
-
-        # Step 3-3: convert each value from string to int
-        array = np.zeros([len(content), len(content)])
-
-        print('len(array)', len(array))
-
-        print('len(content)', len(content))
 
+    return content
+
+
+def _content2array(content, dtype='float64'):
+    """
+    convert rows of a proximity/adjacency matrix (see "read_file") into a n*n
+    NumPy array.
+    """
+
+    # Step 3-1: convert the triangle matrix to a n*n matrix (if necessary)
+    # this means a triangle matrix
+    # add first row, this is m[0, 0]
+    # add elements in each row until the number of elements equal to n
+    if len(content[0]) != len(content[-1]):
+        content.insert(0, ['0'])
         for i in range(0, len(content)):
-            for j in range(0, len(content)):
+            while len(content[i]) != len(content):
+                content[i].append('')
 
-                # print('content[i][j]', content[i][j])
+        # Step 3-2: add value
+        # for each element m[i, j]
+        # for each element in the diagonal line
+        # for each element in the upper part of the triangle
+        for i in range(0, len(content)):
+            for j in range(0, len(content)):
+                if i == j:
+                    content[i][j] = '0'
+                elif i < j:
+                    content[i][j] = content[j][i]
 
-                array[i, j] = float(content[i][j])
+    # Step 3-3: convert each value from string to number
+    return np.array([row[:len(content)] for row in content], dtype=dtype)
 
-                # print('array', array)
 
-        print('array', array)
+def _array2graph(array, keyterms, G, pfnet=False, max=None, min=None,
+                 r=np.inf, inplace=False):
+    """
+    add edges of a proximity/adjacency matrix into a graph, see "cmap2graph".
+    If "inplace" is True, then "array" is overwritten by the PFNet calculation.
+    """
 
-        # Step 4: calculate PFNet (if necessary)
-        if pfnet:
-            if max is not None and min is not None:  # similarity --> distances (if necessary)
-                array = max - array + min
-                # the value that out of range would be set as inf
-                array = np.where((array > min) & (array < max), array, np.inf)
-                array = np.where((array >= min) & (array <= max), array, np.inf)
+    # Step 4: calculate PFNet (if necessary)
+    if pfnet:
+        if max is not None and min is not None:  # similarity --> distances (if necessary)
+            array = _to_distance(array, max, min, inplace=inplace)
+            inplace = True
 
-            array = floyd(array, r=r)
+        array = floyd(array, r=r, inplace=inplace)
 
-        # Step 5: convert it to a graph
-        start, end = np.where(np.tril(array) == True)
-        pairs = []
-        for i in range(0, len(start)):
-            pairs.append([keyterms[start[i]], keyterms[end[i]]])
-        G.add_edges_from(pairs)
-    elif data_type == 'pair':
-        for pair in content:
-            G.add_edge(pair[0], pair[1])
+    # Step 5: convert it to a graph
+    start, end = np.where(np.tril(array) == True)
+    pairs = []
+    for i in range(0, len(start)):
+        pairs.append([keyterms[start[i]], keyterms[end[i]]])
+    G.add_edges_from(pairs)
 
     return G
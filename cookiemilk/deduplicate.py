@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from hashlib import sha1
+import numpy as np
+from .graph_fingerprint import *
+
+
+def deduplicate(items, key=graph_fingerprint):
+    """
+    group identical items, e.g., identical concept maps from copied homework.
+
+    :param items: a list of items, e.g., NetworkX graphs.
+    :param key: a function to identify items, items with the same return value
+    are regarded as identical. Default is "graph_fingerprint". For raw data
+    (e.g., file paths of texts) before "text2graph" or "cmap2graph", use
+    "input_fingerprint".
+    :return: a list of unique items (the first one of each group), and a NumPy
+    array "labels", labels[i] is the index of items[i] in the list of unique
+    items.
+    """
+
+    unique = []
+    groups = {}
+    labels = np.zeros(len(items), dtype=int)
+
+    for i, item in enumerate(items):
+        k = key(item)
+        if k not in groups:
+            groups[k] = len(unique)
+            unique.append(item)
+        labels[i] = groups[k]
+
+    return unique, labels
+
+
+def input_fingerprint(item, read_from_file=True):
+    """
+    calculate a fingerprint of the raw data of a participant.
+
+    :param item: a file path (if "read_from_file" is True), a string, or a list
+    of propositions/rows, see "text2graph" and "cmap2graph".
+    :param read_from_file: if True, then "item" is a file path and the contents
+    of the file are used.
+    :return: a string of 40 hexadecimal digits.
+    """
+
+    if read_from_file:
+        h = sha1()
+        with open(item, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+    elif type(item) is str:
+        return sha1(item.encode('utf-8')).hexdigest()
+    else:
+        return sha1(json.dumps(item, default=str).encode('utf-8')).hexdigest()
+
+
+def dedup_map(func, items, key=graph_fingerprint, **kwargs):
+    """
+    calculate "func(item, **kwargs)" once for each group of identical items,
+    and fan the result out to every item in the group.
+
+    for example:
+    graphs = dedup_map(text2graph, files, key=input_fingerprint,
+                       keyterms=keyterms)
+    Noted that identical items share the same result object, e.g., the same
+    graph.
+
+    :param func: a function, e.g., "text2graph" or "calc_gcent".
+    :param items: a list of items.
+    :param key: see "deduplicate".
+    :param kwargs: other parameters of "func".
+    :return: a list of results, in the same order as "items".
+    """
+
+    unique, labels = deduplicate(items, key)
+    results = [func(item, **kwargs) for item in unique]
+
+    return [results[label] for label in labels]
+
+
+def dedup_pairwise(graphs, metric, key=graph_fingerprint, **kwargs):
+    """
+    calculate a metric between every pair of graphs, but only once for each pair
+    of unique graphs.
+
+    for example:
+    matrix = dedup_pairwise(graphs, calc_tversky, comparison='propositional')
+
+    :param graphs: a list of NetworkX graphs.
+    :param metric: a function of two graphs, e.g., "calc_tversky" or
+    "calc_surface_matching".
+    :param key: see "deduplicate".
+    :param kwargs: other parameters of "metric".
+    :return: a N*N NumPy array (N = number of graphs), value(i, j) is the
+    metric between graphs[i] and graphs[j].
+    """
+
+    unique, labels = deduplicate(graphs, key)
+
+    matrix = np.zeros([len(unique), len(unique)])
+    for i in range(0, len(unique)):
+        for j in range(0, len(unique)):
+            matrix[i, j] = metric(unique[i], unique[j], **kwargs)
+
+    return matrix[np.ix_(labels, labels)]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from hashlib import sha1
+
+
+def graph_fingerprint(G):
+    """
+    calculate a fingerprint of a graph.
+
+    the fingerprint only depends on nodes and edges of the graph, but not on
+    the order of nodes and edges, or the direction of edges. So two graphs have
+    the same fingerprint if and only if they have the same nodes and edges
+    (in the sense of "calc_tversky").
+
+    :param G: a NetworkX graph.
+    :return: a string of 40 hexadecimal digits.
+    """
+
+    nodes = sorted(str(node) for node in G.nodes)
+    edges = sorted(normalize_edge(edge) for edge in G.edges)
+
+    h = sha1()
+    for node in nodes:
+        h.update(node.encode('utf-8') + b'\0')
+    h.update(b'\1')
+    for u, v in edges:
+        h.update(u.encode('utf-8') + b'\0' + v.encode('utf-8') + b'\0')
+
+    return h.hexdigest()
+
+
+def normalize_edge(edge):
+    """
+    convert an edge into a sorted tuple of strings, e.g., ('b', 'a') and
+    ('a', 'b') are both converted into ('a', 'b').
+
+    :param edge: an edge of a NetworkX graph.
+    :return: a tuple.
+    """
+
+    u, v = str(edge[0]), str(edge[1])
+
+    return (u, v) if u <= v else (v, u)
+
+
+def graph_features(G):
+    """
+    get the set of nodes and the set of normalized edges of a graph, which are
+    used in the concept and propositional similarity.
+
+    :param G: a NetworkX graph.
+    :return: a frozenset of nodes and a frozenset of edges (see
+    "normalize_edge").
+    """
+
+    return (frozenset(str(node) for node in G.nodes),
+            frozenset(normalize_edge(edge) for edge in G.edges))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from heapq import nlargest
+from .calc_tversky import *
+from .graph_fingerprint import *
+
+
+class GraphIndex:
+    """
+    an inverted index of graphs for finding the most similar graphs to a query
+    graph, e.g., for plagiarism screening or exemplar retrieval.
+
+    each concept (node) and each proposition (edge) is mapped to a list of
+    graphs which have it. A query only visits graphs that share at least one
+    concept or proposition with the query graph, since the similarity of all
+    other graphs is 0.
+    """
+
+    def __init__(self):
+        self._features = {}  # graph id --> (set of nodes, set of edges)
+        self._postings = {'concept': defaultdict(list),
+                          'propositional': defaultdict(list)}
+
+    def __len__(self):
+        return len(self._features)
+
+    def __contains__(self, graph_id):
+        return graph_id in self._features
+
+    def add(self, graph_id, G):
+        """
+        add a graph into the index.
+
+        :param graph_id: a unique and hashable id of the graph, e.g., name of
+        the participant.
+        :param G: a NetworkX graph.
+        :return: None.
+        """
+
+        assert graph_id not in self._features, f'"{graph_id}" is already added'
+
+        nodes, edges = graph_features(G)
+        self._features[graph_id] = (nodes, edges)
+        for node in nodes:
+            self._postings['concept'][node].append(graph_id)
+        for edge in edges:
+            self._postings['propositional'][edge].append(graph_id)
+
+    def features(self, graph_id, comparison):
+        """
+        :return: the set of nodes (comparison="concept") or the set of edges
+        (comparison="propositional") of a graph in the index.
+        """
+
+        return self._features[graph_id][_FEATURE[comparison]]
+
+    def overlap(self, G, comparison='propositional'):
+        """
+        count the shared concepts or propositions between a graph and every
+        graph in the index that shares at least one of them.
+
+        :param G: a NetworkX graph.
+        :param comparison: "concept" or "propositional".
+        :return: a dict, keys are graph ids and values are the number of shared
+        concepts or propositions.
+        """
+
+        assert comparison in ['concept', 'propositional']
+
+        query = graph_features(G)[_FEATURE[comparison]]
+        postings = self._postings[comparison]
+
+        counts = defaultdict(int)
+        for feature in query:
+            for graph_id in postings.get(feature, ()):
+                counts[graph_id] += 1
+
+        return dict(counts)
+
+    def query(self, G, k=10, comparison='propositional', alpha=0.5):
+        """
+        find k graphs in the index that are the most similar to a graph.
+
+        the similarity is the same as "calc_tversky" (but not rounded), with
+        "G" as graph1. Features of "G" are visited from the rarest one, once k
+        candidates are found and the similarity of any graph not visited yet
+        can not be larger than the k-th best one, no new candidate is accepted.
+
+        :param G: a NetworkX graph.
+        :param k: number of graphs to find.
+        :param comparison: "concept" or "propositional".
+        :param alpha: the parameter "alpha" in the Tversky's similarity.
+        :return: a list of (graph id, similarity), sorted by similarity from
+        high to low. Graphs sharing nothing with "G" are not included.
+        """
+
+        assert comparison in ['concept', 'propositional']
+
+        query = graph_features(G)[_FEATURE[comparison]]
+        postings = self._postings[comparison]
+        m = len(query)
+        beta = 1 - alpha
+
+        # the similarity is common/(alpha*m + beta*size2), so it is increasing
+        # with the number of features in common
+        def kth_score(counts):
+            common = np.fromiter(counts.values(), dtype=float)
+            size2 = np.fromiter((len(self.features(i, comparison))
+                                 for i in counts), dtype=float)
+            s = tversky_from_counts(common, m, size2, alpha)
+            return np.partition(s, len(s) - k)[len(s) - k]
+
+        lists = sorted((postings.get(f, ()) for f in query), key=len)
+
+        counts = defaultdict(int)
+        for j, graph_ids in enumerate(lists):
+            # the best graph not visited yet has all remaining features and
+            # nothing else, and no candidate has more than j features in common
+            remaining = m - j
+            upper = remaining / (alpha * m + beta * remaining)
+            if len(counts) >= k and upper <= j / (alpha * m + beta * j):
+                if upper <= kth_score(counts):
+                    break
+            for graph_id in graph_ids:
+                counts[graph_id] += 1
+
+        # exact similarity of each candidate
+        results = ((i, tversky_from_counts(
+            len(query & self.features(i, comparison)), m,
+            len(self.features(i, comparison)), alpha)) for i in counts)
+
+        return nlargest(k, results, key=lambda x: x[1])
+
+
+_FEATURE = {'concept': 0, 'propositional': 1}
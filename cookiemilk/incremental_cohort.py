@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import networkx as nx
+from .calc_tversky import *
+from .graph_fingerprint import *
+from .graph_index import *
+
+# a record of similarity, graph i as graph1 and graph j as graph2
+_RECORD = np.dtype([('i', '<u4'), ('j', '<u4'), ('s', '<f8')])
+
+
+class IncrementalCohort:
+    """
+    a cohort saved in a directory, which grows one graph at a time, e.g., as
+    submissions arrive during an assessment.
+
+    when a graph is added, only its similarity with graphs that share at least
+    one concept or proposition with it is calculated (see
+    "GraphIndex.overlap"), the similarity with all other graphs is not
+    saved, since it only depends on the sizes of both graphs (see
+    "similarity"). The similarities are appended to
+    "similarity.bin" as (i, j, s) records, and the graph is appended to
+    "graphs.jsonl", so a cohort can be opened again later and nothing is
+    calculated twice, e.g.,
+    with IncrementalCohort('cohort/') as cohort:
+        cohort.add('participant1', G)
+        cohort.neighbours('participant1', k=5)
+        cohort.clusters(threshold=0.6)
+    """
+
+    def __init__(self, directory, comparison='propositional', alpha=0.5):
+        """
+        open a cohort, or create it if the directory has no cohort.
+
+        :param directory: a directory of the cohort.
+        :param comparison: "concept", "propositional" or "semantic", see
+        "calc_tversky". It can not be changed after the cohort is created.
+        :param alpha: the parameter "alpha" in the Tversky's similarity.
+        """
+
+        assert comparison in ['concept', 'propositional', 'semantic']
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.comparison = comparison
+        self.alpha = alpha
+
+        settings = {'comparison': comparison, 'alpha': alpha}
+        settings_file = os.path.join(directory, 'cohort.json')
+        if os.path.exists(settings_file):
+            with open(settings_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            assert saved == settings, \
+                f'the cohort in "{directory}" is created with {saved}'
+        else:
+            with open(settings_file, 'w', encoding='utf-8') as f:
+                json.dump(settings, f)
+
+        self.ids = []
+        self._position = {}
+        self._sizes = []  # (number of nodes, number of edges) of each graph
+        self._rows = []  # similarities of each graph as graph1, j --> s
+        self._index = GraphIndex()
+
+        graphs_file = os.path.join(directory, 'graphs.jsonl')
+        length = 0
+        if os.path.exists(graphs_file):
+            with open(graphs_file, 'r', encoding='utf-8', newline='') as f:
+                for line in f:
+                    # a line without "\n" is not finished when interrupted
+                    if not line.endswith('\n'):
+                        break
+                    length += len(line.encode('utf-8'))
+                    item = json.loads(line)
+                    G = nx.Graph()
+                    G.add_nodes_from(item['nodes'])
+                    G.add_edges_from(item['edges'])
+                    self._append(item['id'], G)
+
+        records_file = os.path.join(directory, 'similarity.bin')
+        if os.path.exists(records_file):
+            records = np.fromfile(records_file, dtype=_RECORD)
+            # records of a graph are written before the graph, so records of
+            # an unfinished graph are at the end
+            valid = np.count_nonzero((records['i'] < len(self.ids)) &
+                                     (records['j'] < len(self.ids)))
+            records = records[:valid]
+            with open(records_file, 'r+b') as f:
+                f.truncate(valid * _RECORD.itemsize)
+            for i, j, s in records.tolist():
+                self._rows[i][j] = s
+
+        self._graphs_file = open(graphs_file, 'a', encoding='utf-8',
+                                 newline='')
+        self._graphs_file.truncate(length)  # remove an unfinished line
+        self._records_file = open(records_file, 'ab')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, graph_id):
+        return graph_id in self._position
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """close files of the cohort."""
+        self._graphs_file.close()
+        self._records_file.close()
+
+    def _append(self, graph_id, G):
+        self._position[graph_id] = len(self.ids)
+        self.ids.append(graph_id)
+        nodes, edges = graph_features(G)
+        self._sizes.append((len(nodes), len(edges)))
+        self._rows.append({})
+        self._index.add(len(self.ids) - 1, G)
+
+    def _similarity(self, G, sizes):
+        """
+        similarity between G and related graphs in the cohort.
+
+        :return: indices of related graphs, similarity with G as graph1, and
+        similarity with G as graph2.
+        """
+
+        # graphs sharing no concept share no proposition either
+        first = 'propositional' if self.comparison == 'propositional' \
+            else 'concept'
+        overlap = self._index.overlap(G, first)
+        related = np.array(sorted(overlap), dtype=int)
+        others = np.array([self._sizes[j] for j in related.tolist()],
+                          dtype=float).reshape(-1, 2)
+
+        counts = [None, None]  # counts of nodes and edges, G as graph1
+        for k, comparison in enumerate(['concept', 'propositional']):
+            if self.comparison in [comparison, 'semantic']:
+                shared = overlap if comparison == first else \
+                    self._index.overlap(G, comparison)
+                common = np.array([shared.get(j, 0) for j in related.tolist()],
+                                  dtype=float)
+                counts[k] = (common, sizes[k], others[:, k])
+
+        s1 = similarity_from_counts(*counts, self.alpha)
+        # the same counts with G as graph2
+        s2 = similarity_from_counts(
+            *[None if c is None else (c[0], c[2], c[1]) for c in counts],
+            self.alpha)
+        k = ['concept', 'propositional', 'semantic'].index(self.comparison)
+
+        return related, s1[k], s2[k]
+
+    def add(self, graph_id, G):
+        """
+        add a graph into the cohort, and save it.
+
+        :param graph_id: a unique string id of the graph, e.g., name of the
+        participant.
+        :param G: a NetworkX graph.
+        :return: a dict, keys are ids of related graphs, values are
+        similarities with G as graph1.
+        """
+
+        assert graph_id not in self._position, f'"{graph_id}" is already added'
+
+        nodes, edges = graph_features(G)
+        related, s1, s2 = self._similarity(G, (len(nodes), len(edges)))
+
+        i = len(self.ids)
+        records = np.zeros(2 * len(related), dtype=_RECORD)
+        records['i'][0::2] = i
+        records['j'][0::2] = related
+        records['s'][0::2] = s1
+        records['i'][1::2] = related
+        records['j'][1::2] = i
+        records['s'][1::2] = s2
+        self._records_file.write(records.tobytes())
+        self._records_file.flush()
+        os.fsync(self._records_file.fileno())
+
+        # the graph is written last, a graph in "graphs.jsonl" means that all
+        # its records are saved
+        item = {'id': graph_id, 'nodes': sorted(nodes),
+                'edges': [list(edge) for edge in sorted(edges)]}
+        self._graphs_file.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self._graphs_file.flush()
+        os.fsync(self._graphs_file.fileno())
+
+        self._append(graph_id, G)
+        for j, a, b in zip(related.tolist(), s1.tolist(), s2.tolist()):
+            self._rows[i][j] = a
+            self._rows[j][i] = b
+
+        return {self.ids[j]: s for j, s in zip(related.tolist(), s1.tolist())}
+
+    def similarity(self, id1, id2):
+        """
+        :return: the similarity with graph id1 as graph1 and graph id2 as
+        graph2, the same as "calc_tversky", NaN if it can not be calculated
+        (e.g., the propositional similarity of two graphs without edges).
+        """
+
+        i, j = self._position[id1], self._position[id2]
+        if j in self._rows[i]:
+            return self._rows[i][j]
+
+        # the graphs share nothing
+        sizes = [(0, self._sizes[i][k], self._sizes[j][k]) for k in range(2)]
+        k = ['concept', 'propositional', 'semantic'].index(self.comparison)
+
+        return similarity_from_counts(*sizes, self.alpha)[k]
+
+    def neighbours(self, graph_id, k=10):
+        """
+        find k graphs that are the most similar to a graph in the cohort.
+
+        :param graph_id: id of the graph.
+        :param k: number of graphs.
+        :return: a list of (graph id, similarity), sorted by similarity from
+        high to low, with the graph as graph1. Graphs sharing nothing with it
+        and NaN similarities are not included.
+        """
+
+        row = self._rows[self._position[graph_id]]
+        best = sorted(((j, s) for j, s in row.items() if not np.isnan(s)),
+                      key=lambda x: (-x[1], x[0]))[:k]
+
+        return [(self.ids[j], s) for j, s in best]
+
+    def clusters(self, threshold=0.5):
+        """
+        group graphs into clusters, two graphs are in the same cluster if the
+        similarity between them (in either direction) >= threshold, or they
+        are linked by such pairs. Graphs sharing nothing are not linked, e.g.,
+        two empty graphs.
+
+        :param threshold: threshold of similarity, larger than 0.
+        :return: a list of clusters (lists of graph ids), from the largest one.
+        Graphs not similar to any others are clusters of one graph.
+        """
+
+        assert threshold > 0, '"threshold" must be larger than 0'
+
+        # union-find
+        parent = list(range(0, len(self.ids)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, row in enumerate(self._rows):
+            for j, s in row.items():
+                if s >= threshold:
+                    parent[find(i)] = find(j)
+
+        clusters = {}
+        for i in range(0, len(self.ids)):
+            clusters.setdefault(find(i), []).append(self.ids[i])
+
+        return sorted(clusters.values(), key=len, reverse=True)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import weakref
+from collections import OrderedDict
+from threading import Lock
+import networkx as nx
+from .calc_graphical_matching import *
+from .calc_surface_matching import *
+from .calc_tversky import *
+from .graph_fingerprint import *
+
+
+class MetricCache:
+    """
+    a bounded LRU cache of similarities between graphs.
+
+    results are keyed by (fingerprint1, fingerprint2, comparison, alpha), see
+    "graph_fingerprint", so the same pair of graphs is only calculated once even
+    if they are different objects, e.g., read again from files.
+
+    the fingerprint of a graph is calculated on every lookup, since a graph
+    may be changed in place. Only the fingerprint of a frozen graph (see
+    "networkx.freeze") is calculated once and remembered while the graph
+    exists, so freeze graphs that are compared many times. Metrics that are
+    cheaper than a lookup (the concept similarity and the surface matching)
+    are calculated directly and not cached.
+    """
+
+    def __init__(self, maxsize=100000):
+        """
+        :param maxsize: maximum number of results kept in the cache. The least
+        recently used result is removed when the cache is full.
+        """
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._fingerprints = weakref.WeakKeyDictionary()
+        self._lock = Lock()
+
+    def calc_tversky(self, graph1, graph2, comparison, alpha=0.5):
+        """see "calc_tversky"."""
+        if comparison == 'concept':
+            return calc_tversky(graph1, graph2, comparison, alpha)
+        return self._get(graph1, graph2, comparison, alpha,
+                         lambda: calc_tversky(graph1, graph2, comparison, alpha))
+
+    def calc_surface_matching(self, graph1, graph2):
+        """see "calc_surface_matching", which is not cached."""
+        return calc_surface_matching(graph1, graph2)
+
+    def calc_graphical_matching(self, graph1, graph2):
+        """see "calc_graphical_matching"."""
+        return self._get(graph1, graph2, 'graphical_matching', None,
+                         lambda: calc_graphical_matching(graph1, graph2))
+
+    def info(self):
+        """
+        :return: a dict of hits, misses, maxsize and currsize (number of
+        results in the cache).
+        """
+
+        return {'hits': self.hits, 'misses': self.misses,
+                'maxsize': self.maxsize, 'currsize': len(self._results)}
+
+    def fingerprint(self, G):
+        """
+        :return: the fingerprint of a graph (see "graph_fingerprint"), which is
+        calculated only once if the graph is frozen (see "networkx.freeze").
+        """
+
+        if not nx.is_frozen(G):
+            return graph_fingerprint(G)
+
+        with self._lock:
+            fingerprint = self._fingerprints.get(G)
+        if fingerprint is None:
+            fingerprint = graph_fingerprint(G)
+            with self._lock:
+                self._fingerprints[G] = fingerprint
+
+        return fingerprint
+
+    def clear(self):
+        """remove all results and reset the statistics."""
+        with self._lock:
+            self._results.clear()
+            self._fingerprints.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, graph1, graph2, comparison, alpha, func):
+        key = (self.fingerprint(graph1), self.fingerprint(graph2), comparison,
+               alpha)
+
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return self._results[key]
+            self.misses += 1
+
+        s = func()
+
+        with self._lock:
+            self._results[key] = s
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+        return s
+
+
+# the cache used by "cached_calc_tversky" etc.
+_default_cache = MetricCache()
+
+
+def cached_calc_tversky(graph1, graph2, comparison, alpha=0.5):
+    """
+    the same as "calc_tversky", but the result is cached, see "MetricCache".
+    """
+    return _default_cache.calc_tversky(graph1, graph2, comparison, alpha)
+
+
+def cached_calc_surface_matching(graph1, graph2):
+    """
+    the same as "calc_surface_matching", kept for symmetry with the other
+    functions, the result is not cached since it is cheaper than a lookup.
+    """
+    return _default_cache.calc_surface_matching(graph1, graph2)
+
+
+def cached_calc_graphical_matching(graph1, graph2):
+    """
+    the same as "calc_graphical_matching", but the result is cached, see
+    "MetricCache".
+    """
+    return _default_cache.calc_graphical_matching(graph1, graph2)
+
+
+def metric_cache_info():
+    """
+    :return: statistics of the cache used by "cached_calc_tversky" etc., see
+    "MetricCache.info".
+    """
+    return _default_cache.info()
+
+
+def metric_cache_clear():
+    """clear the cache used by "cached_calc_tversky" etc."""
+    _default_cache.clear()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from hashlib import blake2b
+from .calc_tversky import *
+from .graph_fingerprint import *
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def minhash_signature(G, comparison='propositional', num_perm=128, seed=1):
+    """
+    calculate the MinHash signature of the nodes or edges of a graph.
+
+    the proportion of equal values in two signatures is an estimate of the
+    Jaccard similarity of two sets, see:
+    Broder, A. Z. (1997). On the resemblance and containment of documents.
+    Proceedings of Compression and Complexity of SEQUENCES 1997, 21-29.
+
+    :param G: a NetworkX graph.
+    :param comparison: "concept" (nodes) or "propositional" (edges).
+    :param num_perm: length of the signature. Larger "num_perm" is more
+    accurate, the standard error of the estimate is about 1/sqrt(num_perm).
+    :param seed: seed of the hash functions. Signatures are comparable only if
+    they have the same "num_perm" and "seed".
+    :return: a NumPy array of "num_perm" uint32 values.
+    """
+
+    assert comparison in ['concept', 'propositional']
+
+    nodes, edges = graph_features(G)
+    if comparison == 'concept':
+        features = nodes
+    else:
+        features = ('\0'.join(edge) for edge in edges)
+
+    # a 32-bit hash of each feature, which is the same in every process
+    hv = np.array([int.from_bytes(blake2b(f.encode('utf-8'),
+                                          digest_size=4).digest(), 'little')
+                   for f in features], dtype=np.uint64)
+
+    a, b = _permutations(num_perm, seed)
+    if len(hv) == 0:
+        return np.full(num_perm, _MAX_HASH, dtype=np.uint32)
+
+    # universal hashing, (a*x + b) mod p, a and x are less than 2^32 so the
+    # product does not overflow
+    phv = ((np.outer(hv, a) + b) % _MERSENNE_PRIME) & _MAX_HASH
+
+    return phv.min(axis=0).astype(np.uint32)
+
+
+def _permutations(num_perm, seed):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_jaccard(sig1, sig2):
+    """
+    estimate the Jaccard similarity from two MinHash signatures.
+
+    :param sig1: a signature from "minhash_signature".
+    :param sig2: another signature.
+    :return: a number of similarity.
+    """
+
+    return float(np.mean(sig1 == sig2))
+
+
+def minhash_tversky(sig1, sig2, size1, size2, alpha=0.5):
+    """
+    estimate Tversky's similarity (see "calc_tversky") from two MinHash
+    signatures and the sizes of two sets.
+
+    :param sig1: a signature from "minhash_signature".
+    :param sig2: another signature.
+    :param size1: number of nodes (concept) or edges (propositional) of graph1.
+    :param size2: number of nodes or edges of graph2.
+    :param alpha: the parameter "alpha" in the Tversky's similarity.
+    :return: a number of similarity.
+    """
+
+    j = minhash_jaccard(sig1, sig2)
+
+    # |A & B| = J*|A | B| = J*(|A| + |B|)/(1 + J)
+    common = min(j * (size1 + size2) / (1 + j), size1, size2)
+
+    return tversky_from_counts(common, size1, size2, alpha)
+
+
+class MinHashLSH:
+    """
+    locality sensitive hashing of MinHash signatures, for finding candidate
+    pairs of similar graphs without comparing every pair.
+
+    each signature is cut into "bands" bands, two graphs become a candidate
+    pair if all values in at least one band are equal. A pair with Jaccard
+    similarity s becomes a candidate with probability 1 - (1 - s^r)^b (b =
+    bands, r = num_perm/bands), the threshold is about (1/b)^(1/r). More bands
+    find more similar pairs but also more false candidates.
+    """
+
+    def __init__(self, num_perm=128, bands=32):
+        """
+        :param num_perm: length of the signatures.
+        :param bands: number of bands, "num_perm" must be divisible by it.
+        """
+
+        assert num_perm % bands == 0, '"num_perm" must be divisible by "bands"'
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [defaultdict(list) for _ in range(0, bands)]
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _band_keys(self, sig):
+        assert len(sig) == self.num_perm
+        sig = np.asarray(sig, dtype=np.uint32)
+        for i in range(0, self.bands):
+            yield sig[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def add(self, key, sig):
+        """
+        :param key: a unique and hashable id of the graph.
+        :param sig: a signature from "minhash_signature". The signature of an
+        empty set (e.g., a graph without edges) is not put into any bucket,
+        since it is the same for all empty sets and shares nothing with others.
+        :return: None.
+        """
+
+        self._keys.append(key)
+        if np.all(np.asarray(sig) == _MAX_HASH):
+            return
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            bucket[band].append(key)
+
+    def query(self, sig):
+        """
+        :param sig: a signature from "minhash_signature".
+        :return: a set of keys which are candidates similar to "sig".
+        """
+
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(band, ()))
+
+        return candidates
+
+    def candidate_pairs(self):
+        """
+        :return: a set of candidate pairs (key1, key2), key1 was added before
+        key2.
+        """
+
+        order = {key: i for i, key in enumerate(self._keys)}
+        pairs = set()
+        for bucket in self._buckets:
+            for keys in bucket.values():
+                for i in range(0, len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        if order[keys[i]] < order[keys[j]]:
+                            pairs.add((keys[i], keys[j]))
+                        else:
+                            pairs.add((keys[j], keys[i]))
+
+        return pairs
+
+
+def find_similar_pairs(
+        graphs,
+        threshold=0.5,
+        comparison='propositional',
+        alpha=0.5,
+        num_perm=128,
+        bands=None,
+        seed=1
+):
+    """
+    find pairs of similar graphs in a large cohort, e.g., near-duplicates.
+
+    candidate pairs are found by "MinHashLSH", then Tversky's similarity of each
+    candidate pair is calculated by "calc_tversky". Pairs which are not
+    candidates are never compared, so some similar pairs might be missed, see
+    "MinHashLSH" for choosing "bands". Graphs without nodes (concept) or edges
+    (propositional) are never candidates.
+
+    :param graphs: a list of NetworkX graphs.
+    :param threshold: pairs with similarity >= threshold are returned.
+    :param comparison: "concept" or "propositional".
+    :param alpha: the parameter "alpha" in the Tversky's similarity.
+    :param num_perm: see "minhash_signature".
+    :param bands: see "MinHashLSH". Default is None, which means that it is
+    chosen from "threshold" and "alpha", so that a pair with similarity equal
+    to "threshold" is a candidate with probability >= 0.95.
+    :param seed: see "minhash_signature".
+    :return: a list of (i, j, similarity), i < j are indices in "graphs",
+    sorted by similarity from high to low.
+    """
+
+    if bands is None:
+        bands = _lsh_bands(threshold, alpha, num_perm)
+
+    lsh = MinHashLSH(num_perm, bands)
+    for i, G in enumerate(graphs):
+        lsh.add(i, minhash_signature(G, comparison, num_perm, seed))
+
+    results = []
+    for i, j in lsh.candidate_pairs():
+        try:
+            s = calc_tversky(graphs[i], graphs[j], comparison, alpha)
+        except ZeroDivisionError:  # both graphs have no edges
+            continue
+        if s >= threshold:
+            results.append((i, j, s))
+
+    results.sort(key=lambda x: (-x[2], x[0], x[1]))
+
+    return results
+
+
+def _lsh_bands(threshold, alpha, num_perm, recall=0.95):
+    """
+    choose the number of bands of "MinHashLSH" for finding pairs with Tversky's
+    similarity >= threshold.
+
+    :return: the smallest number of bands (i.e., the fewest false candidates),
+    with which a pair at the threshold is a candidate with probability >=
+    recall.
+    """
+
+    # the lowest Jaccard similarity of a pair with Tversky's similarity s:
+    # s = c/(alpha*a + beta*b) and J = c/(a + b - c), let q = (alpha*a +
+    # beta*b)/(a + b), then J = s*q/(1 - s*q), q is linear in t = a/(a + b),
+    # and c <= a, c <= b gives the range of t
+    s = threshold
+    beta = 1 - alpha
+    t_min = s * beta / (1 + s * beta - s * alpha)
+    t_max = (1 - s * beta) / (1 + s * alpha - s * beta)
+    q = min(alpha * t + beta * (1 - t) for t in [t_min, t_max])
+    j = s * q / (1 - s * q) if s * q < 1 else 1.0
+
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        if 1 - (1 - j ** rows) ** bands >= recall:
+            return bands
+
+    return num_perm
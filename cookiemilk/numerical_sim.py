@@ -1,15 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import numpy as np
+
+
 def numerical_sim(value1, value2):
     """
     calculate numerical similarity, see "calc_tversky"
 
-    :param value1: a value.
-    :param value2: another value.
-    :return: a number of similarity.
+    :param value1: a value, or a NumPy array of values.
+    :param value2: another value, or an array of values. If either of values is
+    an array, then the similarity is calculated element-wise, and the similarity
+    of 0 and 0 is NaN.
+    :return: a number (or an array) of similarity.
     """
 
-    s = 1 - abs(value1 - value2)/max(value1, value2)
+    if np.ndim(value1) == 0 and np.ndim(value2) == 0:
+        s = 1 - abs(value1 - value2)/max(value1, value2)
+    else:
+        value1 = np.asarray(value1, dtype=float)
+        value2 = np.asarray(value2, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = 1 - np.abs(value1 - value2)/np.maximum(value1, value2)
 
     return s
@@ -3,13 +3,15 @@
 
 import numpy as np
 import networkx as nx
+from heapq import heappop, heappush
 
 
-def pathfinder_network(G, max, min, r=np.inf):
+def pathfinder_network(G, max, min, r=np.inf, sparse=False):
     """
     convert a graph into the PFNet.
 
-    :param G: a NetworkX graph.
+    :param G: a NetworkX graph, the weight of each edge is the attribute
+    "weight" (default is 1), edges not in the graph are not linked.
     :param max: a parameter used to convert the similarity matrix into the dis-
     similarity matrix if necessary. for example, if each value of the origin
     matrix ranges from 0 to 1, then "max" will be 1 and "min" will be 0.1. If
@@ -21,23 +23,29 @@ def pathfinder_network(G, max, min, r=np.inf):
     see "Schvaneveldt, R. W., Durso, F. T., & Dearhold, D. W. (1989). Network
     structures in proximity data. Psychology of Learning and Motivation, 24,
     249-284".
+    :param sparse: if True, then the PFNet is calculated from the edges only,
+    without any n*n matrix, see "_pathfinder_sparse". It is faster and needs
+    much less memory for a large graph with few edges.
     :return: a NetworkX graph, which is a PFNet.
     """
 
+    if sparse:
+        return _pathfinder_sparse(G, max, min, r)
+
     # get adjacency matrix from a graph
     array = nx.to_numpy_array(G)
-    origin = array.copy()
+    links = nx.to_numpy_array(G, weight=None) > 0
     nodes = list(G.nodes)
 
     # similarity --> dissimilarity (if necessary)
     if max is not None and min is not None:
-        array = max - array + min
+        array = _to_distance(array, max, min, inplace=True)
 
-    # the value that out of range would be set as inf
-    array = np.where((array > origin.mix()) & (array < origin.max()), array, np.inf)
+    # no edge in the graph means no link
+    array[~links] = np.inf
 
     # pathfinder algorithm
-    array = floyd(dis=array, r=r)  # this array is a PFNet
+    array = floyd(dis=array, r=r, inplace=True)  # this array is a PFNet
 
     # convert the PFNet to a NetworkX graph
     start, end = np.where(np.tril(array) == True)
@@ -50,7 +58,145 @@ def pathfinder_network(G, max, min, r=np.inf):
     return G
 
 
-def floyd(dis, r=np.inf):
+def _pathfinder_sparse(G, max, min, r=np.inf):
+    """
+    calculate the PFNet (q = n - 1) of an undirected graph from its edges.
+
+    an edge is kept if no path between its nodes is shorter than the edge
+    itself, where the length of a path is the Minkowski r-metric of its edges,
+    which is the same as "floyd". For a finite r, the edges are kept in a CSR
+    (compressed sparse row) adjacency and searched by "_pathfinder_dijkstra",
+    for r = inf, see "_pathfinder_minimax". Memory is O(E) rather than O(n*n).
+
+    see "pathfinder_network" for parameters.
+    """
+
+    nodes = list(G.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+
+    src, dst, dis = [], [], []
+    for u, v, w in G.edges(data='weight', default=1):
+        if u == v:
+            continue
+        # similarity --> dissimilarity (if necessary)
+        if max is not None and min is not None:
+            w = max - w + min
+            if not min < w < max:  # the value that out of range
+                continue
+        elif not w < np.inf:
+            continue
+        src += [index[u], index[v]]
+        dst += [index[v], index[u]]
+        dis += [w, w]
+
+    if r == np.inf:
+        return _pathfinder_minimax(nodes, src, dst, dis)
+
+    # CSR adjacency: neighbours of node i are indices[indptr[i]:indptr[i + 1]]
+    src = np.array(src, dtype=np.int64)
+    order = np.argsort(src, kind='stable')
+    indices = np.array(dst, dtype=np.int64)[order]
+    data = np.array(dis, dtype=float)[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    return _pathfinder_dijkstra(nodes, indptr, indices, data, r)
+
+
+def _pathfinder_minimax(nodes, src, dst, dis):
+    """
+    when r is infinity, the length of a path is its longest edge, so an edge is
+    kept if its nodes are not connected by edges shorter than it. Edges are
+    added from the shortest one into a union-find structure, edges of the same
+    length are checked before any of them is added.
+
+    :return: a PFNet.
+    """
+
+    parent = list(range(0, len(nodes)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # each undirected edge is stored twice, keep one of them
+    edges = sorted((w, u, v) for u, v, w in zip(src, dst, dis) if u < v)
+
+    pairs = []
+    start = 0
+    while start < len(edges):
+        stop = start
+        # lengths are compared exactly, which is the same as "floyd"
+        while stop < len(edges) and edges[stop][0] == edges[start][0]:
+            stop += 1
+        for w, u, v in edges[start:stop]:
+            if find(u) != find(v):
+                pairs.append([nodes[u], nodes[v]])
+        for w, u, v in edges[start:stop]:
+            parent[find(u)] = find(v)
+        start = stop
+
+    G = nx.Graph()
+    G.add_edges_from(pairs)
+
+    return G
+
+
+def _pathfinder_dijkstra(nodes, indptr, indices, data, r):
+    """
+    for each node, the minimum distances to its neighbours are found by
+    Dijkstra's algorithm, where the length of a path is (sum of w^r)^(1/r). The
+    search stops once it is further than every edge of the node. Lengths are
+    compared as sums of w^r with the same relative tolerance as "floyd".
+
+    :return: a PFNet.
+    """
+
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    cost = (data ** r).tolist()
+    tolerance = 4 * np.finfo(data.dtype).eps
+
+    pairs = []
+    for u in range(0, len(nodes)):
+        # each edge is checked from the node with a smaller index
+        targets = {indices[k]: cost[k] for k in range(indptr[u], indptr[u + 1])
+                   if indices[k] > u}
+        if not targets:
+            continue
+        limit = max(targets.values())
+
+        distance = {u: 0.0}
+        heap = [(0.0, u)]
+        finished = set()
+        while heap:
+            d, x = heappop(heap)
+            if x in finished:
+                continue
+            if d > limit:
+                break
+            finished.add(x)
+            for k in range(indptr[x], indptr[x + 1]):
+                y = indices[k]
+                dy = d + cost[k]
+                if dy < distance.get(y, np.inf):
+                    distance[y] = dy
+                    heappush(heap, (dy, y))
+
+        for v, c in targets.items():
+            if not distance[v] < c * (1 - tolerance):
+                pairs.append([nodes[u], nodes[v]])
+
+    G = nx.Graph()
+    G.add_edges_from(pairs)
+
+    return G
+
+
+def floyd(dis, r=np.inf, dtype=None, inplace=False, buffer=None):
     """
 
     derived from:
@@ -93,19 +239,107 @@ def floyd(dis, r=np.inf):
 
     :param dis: dissimilarity matrix
     :param r: value of the r parameter
+    :param dtype: data type used in the calculation, e.g., "float32" needs half
+    of the memory of "float64". Integer types (e.g., "int16") are supported
+    when r is infinity (i.e., ordinal distances), and inf is represented by the
+    largest integer. Default is None, which means the data type of "dis".
+    :param inplace: if True, "dis" is overwritten by the minimum distances
+    rather than copied, so that only about one n*n matrix is in memory. "dis"
+    must be a NumPy array of "dtype" (if given).
+    :param buffer: a preallocated array with n columns and any number of rows,
+    reused as the scratch space of the calculation, e.g., for calling floyd()
+    for many matrices of the same size.
     :return: a PFNet.
     """
 
-    mindis = dis.copy()
+    dis = np.asarray(dis)
+    dtype = np.dtype(dtype) if dtype is not None else dis.dtype
+    n = dis.shape[0]
+    inf = _infinity(dtype)
+    integer = np.issubdtype(dtype, np.integer)
+
+    assert not integer or r == np.inf, \
+        'integer distances are only supported when r is infinity'
+
+    if inplace:
+        assert dis.dtype == dtype, 'the data type of "dis" must be "dtype"'
+        mindis = dis
+    elif integer and not np.issubdtype(dis.dtype, np.integer):
+        mindis = np.where(dis < np.inf, dis, inf).astype(dtype)
+    else:
+        mindis = dis.astype(dtype, copy=True)
+
+    # a link survives unless a shorter indirect path is found
+    tflinks = mindis < inf
+
+    # for a finite r, distances are compared as d^r, so that the length of a
+    # path is a sum (no root is taken in the loop) and ties of integer data
+    # are exact, the tolerance is relative to the precision of "dtype"
+    power = 0 < r < np.inf and r != 1
+    if power:
+        mindis **= r
+    if integer or r == np.inf:
+        tolerance = 0
+    else:
+        tolerance = 4 * np.finfo(dtype).eps
+
+    if buffer is None:
+        buffer = np.empty([_block_rows(n), n], dtype=dtype)
+    assert buffer.dtype == dtype and buffer.shape[1] == n
 
-    for ind in range(0, dis.shape[0]):
-        for row in range(0, dis.shape[0]):
-            for col in range(0, dis.shape[0]):
-                # indirect = minkowski(mindis(row,ind), mindis(ind,col),r)
-                indirect = np.linalg.norm([mindis[row, ind], mindis[ind, col]], r)
-                if indirect < mindis[row, col]:
-                    mindis[row, col] = indirect
+    for ind in range(0, n):
+        # the row and column of "ind" do not change in this iteration
+        col = mindis[:, ind].copy()
+        row = mindis[ind, :].copy()
 
-    tflinks = (dis < np.inf) & (abs(mindis - dis) < 1e-14)
+        for start in range(0, n, buffer.shape[0]):
+            stop = start + buffer.shape[0]
+            if stop > n:
+                stop = n
+            indirect = buffer[:stop - start]
+            current = mindis[start:stop]
+
+            # indirect = minkowski(mindis(row,ind), mindis(ind,col),r)
+            if r == np.inf:
+                np.maximum(col[start:stop, None], row[None, :], out=indirect)
+                tflinks[start:stop] &= ~(indirect < current)
+            else:
+                np.add(col[start:stop, None], row[None, :], out=indirect)
+                tflinks[start:stop] &= ~(indirect < current * (1 - tolerance))
+            np.copyto(current, indirect, where=indirect < current)
+
+    if power:
+        mindis **= 1 / r
 
     return tflinks
+
+
+def _infinity(dtype):
+    """
+    :return: the value represented infinity (no link) of a data type.
+    """
+
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).max
+    return np.inf
+
+
+def _block_rows(n):
+    # rows of the scratch space, about 1M elements
+    return int(np.clip((1 << 20) // np.maximum(n, 1), 1, np.maximum(n, 1)))
+
+
+def _to_distance(array, max, min, inplace=False):
+    """
+    similarity --> distances, i.e., max - array + min, and the value that out
+    of range (min, max) would be set as inf.
+    """
+
+    if inplace:
+        np.subtract(max, array, out=array)
+        array += min
+    else:
+        array = max - array + min
+    array[~((array > min) & (array < max))] = _infinity(array.dtype)
+
+    return array
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Pool
+import numpy as np
+
+# arrays of each worker process, see "_init_worker"
+_worker = {}
+
+
+def permutation_test(
+        scores,
+        groups,
+        n_permutations=10000,
+        alternative='two-sided',
+        seed=None,
+        processes=1,
+        batch_size=1000
+):
+    """
+    test whether two groups differ in their scores, e.g., the similarity of
+    each participant's graph to an expert's graph (see "calc_metrics_table").
+
+    the statistic is mean(scores of group a) - mean(scores of group b), where
+    a and b are the two labels in "groups", sorted. Scores are calculated only
+    once, each permutation shuffles the labels, so thousands of permutations
+    are only a few matrix products.
+
+    :param scores: a list or NumPy array of scores, one score per participant.
+    Participants with NaN scores are not included.
+    :param groups: a list or NumPy array of group labels, e.g., "control" and
+    "treatment", two labels only.
+    :param n_permutations: number of permutations.
+    :param alternative: "two-sided", "greater" (mean of a > mean of b) or "less".
+    :param seed: seed of the random number generator. With the same seed, the
+    result is the same whatever "processes" is.
+    :param processes: number of processes. Default is 1, which means the
+    current process. If None, then the number of CPUs.
+    :param batch_size: number of permutations calculated at a time.
+    :return: the statistic, the p-value, and a NumPy array of the statistics of
+    all permutations.
+    """
+
+    scores = np.asarray(scores, dtype=float)
+    x = _labels(groups, len(scores))
+    valid = ~np.isnan(scores)
+    scores, x = scores[valid], x[valid]
+
+    data = {'scores': scores, 'size': int(x.sum())}
+    observed = _score_difference(data, x[None, :].astype(float))[0]
+    null = _resample(_score_batch, data, n_permutations, seed, processes,
+                     batch_size)
+
+    return observed, _p_value(observed, null, alternative), null
+
+
+def within_group_test(
+        matrix,
+        groups,
+        n_permutations=10000,
+        alternative='two-sided',
+        seed=None,
+        processes=1,
+        batch_size=1000
+):
+    """
+    test whether two groups differ in their within-group similarity, i.e., the
+    mean similarity between graphs of the same group.
+
+    the statistic is (within-group similarity of group a) - (within-group
+    similarity of group b), where a and b are the two labels in "groups",
+    sorted. The similarity of a group is the mean of matrix(i, j) of all i != j
+    in the group. The pairwise matrix is calculated only once (e.g., by
+    "calc_pairwise_matrix"), each permutation is a matrix product.
+
+    :param matrix: N*N similarity matrix, NaN values are not included.
+    :param groups: a list or NumPy array of group labels, two labels only.
+    :param n_permutations: number of permutations.
+    :param alternative: "two-sided", "greater" or "less", see
+    "permutation_test".
+    :param seed: see "permutation_test".
+    :param processes: see "permutation_test".
+    :param batch_size: number of permutations calculated at a time.
+    :return: the statistic, the p-value, and a NumPy array of the statistics of
+    all permutations.
+    """
+
+    # float32 matrices (e.g., from "calc_pairwise_matrix") are calculated in
+    # float32, which is about two times faster
+    matrix = np.asarray(matrix)
+    if matrix.dtype != np.float32:
+        matrix = matrix.astype(float)
+    assert matrix.ndim == 2 and matrix.shape[0] == matrix.shape[1], \
+        '"matrix" must be a N*N matrix'
+    x = _labels(groups, len(matrix))
+
+    # NaN and diagonal values are counted as 0, and are not in the number of
+    # pairs
+    valid = ~np.isnan(matrix)
+    np.fill_diagonal(valid, False)
+    data = {'matrix': np.where(valid, matrix, 0), 'size': int(x.sum()),
+            'valid': None if valid.sum() == len(x) * (len(x) - 1) else
+            valid.astype(matrix.dtype)}
+
+    observed = float(_within_difference(data, x[None, :].astype(float))[0])
+    null = _resample(_within_batch, data, n_permutations, seed, processes,
+                     batch_size)
+
+    return observed, _p_value(observed, null, alternative), null
+
+
+def bootstrap_ci(
+        scores,
+        groups=None,
+        n_resamples=10000,
+        confidence=0.95,
+        seed=None,
+        processes=1,
+        batch_size=1000
+):
+    """
+    calculate the bootstrap (percentile) confidence interval of the mean
+    score, or of the difference between the mean scores of two groups (see
+    "permutation_test"), participants are resampled within each group.
+
+    :param scores: a list or NumPy array of scores. NaN scores are not
+    included.
+    :param groups: a list or NumPy array of group labels, two labels only.
+    Default is None, which means one group.
+    :param n_resamples: number of bootstrap resamples.
+    :param confidence: confidence level of the interval.
+    :param seed: see "permutation_test".
+    :param processes: see "permutation_test".
+    :param batch_size: number of resamples calculated at a time.
+    :return: the mean (or the difference), the lower and the upper bound.
+    """
+
+    scores = np.asarray(scores, dtype=float)
+    if groups is None:
+        x = np.ones(len(scores), dtype=bool)
+    else:
+        x = _labels(groups, len(scores))
+    valid = ~np.isnan(scores)
+    scores, x = scores[valid], x[valid]
+
+    data = {'a': scores[x], 'b': scores[~x] if groups is not None else None}
+    estimate = np.mean(data['a'])
+    if data['b'] is not None:
+        estimate -= np.mean(data['b'])
+
+    means = _resample(_bootstrap_batch, data, n_resamples, seed, processes,
+                      batch_size)
+    low, high = np.percentile(means, [(1 - confidence) / 2 * 100,
+                                      (1 + confidence) / 2 * 100])
+
+    return estimate, low, high
+
+
+def _labels(groups, n):
+    """
+    :return: a bool array, True for group a (the first label, sorted).
+    """
+
+    groups = np.asarray(groups)
+    assert len(groups) == n, 'the numbers of groups and participants differ'
+    labels = np.unique(groups)
+    assert len(labels) == 2, f'"groups" must have 2 labels, not {len(labels)}'
+
+    return groups == labels[0]
+
+
+def _p_value(observed, null, alternative):
+    """
+    the proportion of permutations as extreme as the observed statistic, the
+    observed one included.
+    """
+
+    assert alternative in ['two-sided', 'greater', 'less']
+
+    if alternative == 'greater':
+        extreme = null >= observed
+    elif alternative == 'less':
+        extreme = null <= observed
+    else:
+        extreme = np.abs(null) >= np.abs(observed)
+
+    return (np.count_nonzero(extreme) + 1) / (len(null) + 1)
+
+
+def _resample(func, data, n, seed, processes, batch_size):
+    """
+    call func(data, rng, size) on batches of "batch_size" resamples, each batch
+    has its own random number generator from "seed", so the result does not
+    depend on the number of processes.
+
+    :return: a NumPy array of n statistics.
+    """
+
+    sizes = [batch_size] * (n // batch_size)
+    if n % batch_size:
+        sizes.append(n % batch_size)
+    tasks = [(func, s, size) for s, size in
+             zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes)]
+
+    if processes == 1:
+        _init_worker(data)
+        results = list(map(_call, tasks))
+    else:
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(data,)) as pool:
+            results = pool.map(_call, tasks)
+
+    return np.concatenate([np.empty(0)] + results)
+
+
+def _init_worker(data):
+    _worker['data'] = data
+
+
+def _call(task):
+    func, seed, size = task
+    return func(_worker['data'], np.random.default_rng(seed), size)
+
+
+def _permutations(rng, size, n, k):
+    """
+    :return: size*n float array of 0 and 1, each row has k random 1.
+    """
+
+    order = np.argsort(rng.random((size, n)), axis=1)
+    x = np.zeros((size, n))
+    np.put_along_axis(x, order[:, :k], 1, axis=1)
+    return x
+
+
+def _score_difference(data, x):
+    scores = data['scores']
+    k = data['size']
+    sum_a = x @ scores
+    return sum_a / k - (scores.sum() - sum_a) / (len(scores) - k)
+
+
+def _score_batch(data, rng, size):
+    x = _permutations(rng, size, len(data['scores']), data['size'])
+    return _score_difference(data, x)
+
+
+def _within_difference(data, x):
+    matrix = data['matrix']
+    x = x.astype(matrix.dtype)
+    y = 1 - x
+
+    # sum of matrix(i, j) of i, j in a group, by (x @ matrix) . x
+    sum_a = np.einsum('ij,ij->i', x @ matrix, x)
+    sum_b = np.einsum('ij,ij->i', y @ matrix, y)
+    if data['valid'] is None:
+        k = data['size']
+        n = len(matrix) - k
+        pairs_a, pairs_b = k * (k - 1), n * (n - 1)
+    else:
+        pairs_a = np.einsum('ij,ij->i', x @ data['valid'], x)
+        pairs_b = np.einsum('ij,ij->i', y @ data['valid'], y)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sum_a / pairs_a - sum_b / pairs_b
+
+
+def _within_batch(data, rng, size):
+    x = _permutations(rng, size, len(data['matrix']), data['size'])
+    return _within_difference(data, x)
+
+
+def _bootstrap_batch(data, rng, size):
+    def means(scores):
+        return scores[rng.integers(0, len(scores), (size, len(scores)))].mean(
+            axis=1)
+
+    if data['b'] is None:
+        return means(data['a'])
+    return means(data['a']) - means(data['b'])
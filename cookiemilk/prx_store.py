@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import struct
+from os.path import basename, splitext
+import numpy as np
+import networkx as nx
+from .cmap2graph import _array2graph, _content2array, _select_rows
+from .read_file import *
+
+# a .cmprx file is: magic string, length of header (4 bytes, little-endian),
+# header (JSON), padding, then N n*n matrices in C order
+_MAGIC = b'\x93CMPRX\x01\x00'
+_ALIGN = 64
+
+
+class PrxStore:
+    """
+    a store of many participants' n*n proximity matrices with shared key-terms,
+    packed into one memory-mapped file.
+
+    opening a store only reads a small header, matrices are read from disk when
+    they are used, e.g.,
+    store = PrxStore('cohort.cmprx')
+    array = store['participant1']  # or store[0], a n*n array without copying
+    G = store.graph(0, pfnet=True, max=1, min=0.1)
+    """
+
+    def __init__(self, filename, mode='r'):
+        """
+        open a store created by "PrxStore.create" or "pack_prx_files".
+
+        :param filename: file path of the store.
+        :param mode: "r" (read-only) or "r+" (read and write).
+        """
+
+        with open(filename, 'rb') as f:
+            magic = f.read(len(_MAGIC))
+            assert magic == _MAGIC, f'"{filename}" is not a proximity store'
+            length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(length).decode('utf-8'))
+
+        self.filename = filename
+        self.keyterms = header['keyterms']
+        self.names = header['names']
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.matrices = np.memmap(filename, dtype=np.dtype(header['dtype']),
+                                  mode=mode, offset=header['offset'],
+                                  shape=tuple(header['shape']))
+
+    @classmethod
+    def create(cls, filename, keyterms, names, dtype='float64'):
+        """
+        create an empty store, matrices are filled by store[i] = array.
+
+        :param filename: file path of the store, ".cmprx" is recommended.
+        :param keyterms: a list of key-terms, i.e., rows and columns of every
+        matrix.
+        :param names: a list of unique names of participants.
+        :param dtype: data type of matrices, e.g., "float64" or "float32".
+        :return: a PrxStore opened as "r+".
+        """
+
+        assert len(set(names)) == len(names), 'names must be unique'
+
+        n = len(keyterms)
+        header = {'keyterms': list(keyterms), 'names': list(names),
+                  'shape': [len(names), n, n], 'dtype': np.dtype(dtype).str}
+
+        # the offset of matrices is saved in the header, so leave enough space
+        # for the number itself
+        header['offset'] = 0
+        size = len(_MAGIC) + 4 + len(json.dumps(header).encode('utf-8')) + 32
+        header['offset'] = (size + _ALIGN - 1) // _ALIGN * _ALIGN
+        data = json.dumps(header).encode('utf-8')
+
+        with open(filename, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack('<I', len(data)))
+            f.write(data)
+            f.write(b'\0' * (header['offset'] - f.tell()))
+            f.truncate(header['offset'] +
+                       len(names) * n * n * np.dtype(dtype).itemsize)
+
+        return cls(filename, mode='r+')
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, key):
+        """
+        :param key: an index or a name of participant.
+        :return: the index.
+        """
+
+        if isinstance(key, str):
+            return self._index[key]
+        return key
+
+    def __getitem__(self, key):
+        return self.matrices[self.index(key)]
+
+    def __setitem__(self, key, array):
+        self.matrices[self.index(key)] = array
+
+    def graph(self, key, pfnet=False, max=None, min=None, r=np.inf):
+        """
+        convert a matrix into a graph, the same as "cmap2graph" with
+        data_type="array".
+
+        :param key: an index or a name of participant.
+        :param pfnet: see "cmap2graph".
+        :param max: see "cmap2graph".
+        :param min: see "cmap2graph".
+        :param r: see "cmap2graph".
+        :return: a NetworkX graph.
+        """
+
+        i = self.index(key)
+        G = nx.Graph()
+        G.name = self.names[i]
+
+        return _array2graph(self.matrices[i], self.keyterms, G, pfnet, max,
+                            min, r)
+
+    def graphs(self, pfnet=False, max=None, min=None, r=np.inf):
+        """
+        :return: a generator of graphs of every participant, see "graph".
+        """
+
+        for i in range(0, len(self)):
+            yield self.graph(i, pfnet, max, min, r)
+
+    def flush(self):
+        """write changes into the file."""
+        self.matrices.flush()
+
+
+def pack_prx_files(
+        files,
+        filename,
+        keyterms,
+        encoding='utf-8',
+        read_from=0,
+        dtype='float64'
+):
+    """
+    pack proximity/adjacency matrix files (see "cmap2graph" with
+    data_type="array") into one PrxStore, so that a cohort is parsed only once.
+
+    :param files: a list of file paths, e.g., from "get_data_files_name".
+    Names of participants are the file names without extension, so they must
+    be unique.
+    :param filename: file path of the store.
+    :param keyterms: a list of key-terms.
+    :param encoding: encoding of the files.
+    :param read_from: see "cmap2graph".
+    :param dtype: see "PrxStore.create".
+    :return: a PrxStore opened as "r+".
+    """
+
+    names = [splitext(basename(file))[0] for file in files]
+    store = PrxStore.create(filename, keyterms, names, dtype)
+
+    for i, file in enumerate(files):
+        content = _select_rows(read_file(file, encoding=encoding), read_from)
+        store[i] = _content2array(content)
+    store.flush()
+
+    print(f'{len(files)} files are packed into "{filename}".')
+
+    return store
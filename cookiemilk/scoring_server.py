@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock
+from .calc_metrics_table import *
+from .calc_metrics_table import _metrics_chunk, _summary
+from .cmap2graph import *
+from .text2graph import *
+from .text2graph import _compile_keyterms, _text2graph_compiled
+
+
+def serve(
+        host='127.0.0.1',
+        port=8000,
+        keyterms=None,
+        references=None
+):
+    """
+    start a local scoring service, which keeps key-terms, synonyms and
+    reference graphs in memory.
+
+    the service receives and returns JSON by HTTP POST:
+
+    /keyterms   {"name": "bees", "keyterms": [...], "synonym": {...}}
+    register a set of key-terms (and synonyms).
+
+    /references {"name": "expert", "keyterms": "bees", "text": "..."}
+    register a reference graph, converted from "text" (a string, converted by
+    "text2graph" with the registered key-terms) or "pairs" (a list of
+    propositions, converted by "cmap2graph").
+
+    /score      {"keyterms": "bees", "reference": "expert", "text": "..."}
+    convert "text" or "pairs" into a graph and compare it with the reference
+    graph. Optional fields are "alpha" (see "calc_tversky") and "pfnet", "max",
+    "min" and "r" (see "text2graph"). It returns the edges of the graph, the
+    concept, propositional and semantic similarity, the surface matching, the
+    graphical matching and the gcent. A value is null if it can not be
+    calculated for this graph, e.g., graphical matching of a disconnected graph.
+
+    and GET /status returns names of the registered key-terms and references.
+
+    :param host: default is "127.0.0.1", i.e., only for local connections.
+    :param port: default is 8000.
+    :param keyterms: a dict of key-terms registered before start, e.g.,
+    {"bees": {"keyterms": [...], "synonym": {...}}}.
+    :param references: a dict of reference graphs registered before start,
+    e.g., {"expert": {"keyterms": "bees", "graph": G}}, where G is a NetworkX
+    graph.
+    :return: None. Stop the service by Ctrl+C.
+    """
+
+    server = _ThreadingServer((host, port), _ScoringHandler)
+    server.state = _ScoringState()
+
+    for name, item in (keyterms or {}).items():
+        server.state.add_keyterms(name, item['keyterms'], item.get('synonym'))
+    for name, item in (references or {}).items():
+        server.state.add_reference(name, item['keyterms'], item['graph'])
+
+    print(f'Scoring service is running on http://{host}:{port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    """
+    a HTTP server handling each request in a thread, the same as
+    http.server.ThreadingHTTPServer, which is not available before Python 3.7.
+    """
+
+    daemon_threads = True
+
+
+class _ScoringState:
+    """
+    registered key-terms and reference graphs of a running service.
+    """
+
+    def __init__(self):
+        self.keyterms = {}  # name --> compiled key-terms
+        # name --> (name of key-terms, summary of graph, see "_summary")
+        self.references = {}
+        self.lock = Lock()
+
+    def add_keyterms(self, name, keyterms, synonym=None):
+        _check_keyterms(keyterms, synonym)
+        state = _compile_keyterms(keyterms, synonym)
+        with self.lock:
+            self.keyterms[name] = state
+
+    def add_reference(self, name, keyterms, G):
+        summary = _summary(G)
+        with self.lock:
+            self.references[name] = (keyterms, summary)
+
+    def to_graph(self, request):
+        state = self.keyterms[request['keyterms']]
+        if 'text' in request:
+            return _text2graph_compiled(
+                request['text'], state, read_from_file=False,
+                name=request.get('name'),
+                as_lower=request.get('as_lower', True),
+                pfnet=request.get('pfnet', False),
+                max=request.get('max'),
+                min=request.get('min'),
+                r=request.get('r', np.inf))
+        else:
+            return cmap2graph(request['pairs'], 'pair',
+                              keyterms=state['keyterms'], read_from_file=False)
+
+    def score(self, request):
+        keyterms, reference = self.references[request['reference']]
+        request.setdefault('keyterms', keyterms)
+        G = self.to_graph(request)
+        alpha = request.get('alpha', 0.5)
+
+        table = _metrics_chunk([_summary(G)], reference, alpha)
+
+        result = {'edges': [list(e) for e in G.edges]}
+        for metric in METRICS:
+            s = float(table[metric][0])
+            result[metric] = None if np.isnan(s) else s
+
+        return result
+
+
+def _check_keyterms(keyterms, synonym=None):
+    """
+    check key-terms and synonyms before "_compile_keyterms", which prints the
+    error and exits, so that the reason can be returned to the client.
+
+    :raise ValueError: if key-terms or synonyms are unrecognized.
+    """
+
+    if type(keyterms) != list:
+        raise ValueError('the "keyterms" is unrecognized, it must be a list '
+                         'object!')
+
+    forms = set()
+    for e in keyterms:
+        terms = e if type(e) == list else [e]
+        if not all(type(t) == str for t in terms):
+            raise ValueError(f'the "keyterms" is unrecognized, {e!r} is not a '
+                             f'string or a list of strings!')
+        forms.update(terms)
+
+    if synonym:
+        if type(synonym) != dict:
+            raise ValueError('the "synonym" is unrecognized, it must be a dict '
+                             'object!')
+        for key_term, terms in synonym.items():
+            if type(terms) != list:
+                raise ValueError('the "synonym" is unrecognized, the value of '
+                                 'each key must be a list object!')
+            if key_term not in forms:
+                raise ValueError(f'the "synonym" is unrecognized, "{key_term}" '
+                                 f'is not a key-term!')
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == '/status':
+            self._reply(200, {'keyterms': sorted(state.keyterms),
+                              'references': sorted(state.references)})
+        else:
+            self._reply(404, {'error': f'unknown path "{self.path}"'})
+
+    def do_POST(self):
+        state = self.server.state
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+
+            if self.path == '/keyterms':
+                state.add_keyterms(request['name'], request['keyterms'],
+                                   request.get('synonym'))
+                self._reply(200, {'keyterms': request['name']})
+            elif self.path == '/references':
+                G = state.to_graph(request)
+                state.add_reference(request['name'], request['keyterms'], G)
+                self._reply(200, {'reference': request['name'],
+                                  'edges': [list(e) for e in G.edges]})
+            elif self.path == '/score':
+                self._reply(200, state.score(request))
+            else:
+                self._reply(404, {'error': f'unknown path "{self.path}"'})
+        except KeyError as e:
+            self._reply(400, {'error': f'{e} is missing or not registered'})
+        except ValueError as e:  # e.g., unrecognized key-terms or synonyms
+            self._reply(400, {'error': str(e)})
+        except (SystemExit, Exception) as e:
+            self._reply(400, {'error': repr(e)})
+
+    def _reply(self, code, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # do not print a line for every request
+        pass
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from multiprocessing import Pool
+import numpy as np
+import networkx as nx
+from .calc_tversky import *
+from .graph_fingerprint import *
+from .pathfinder_network import *
+from .pathfinder_network import _to_distance
+
+# number of 1 bits of every byte
+_POPCOUNT = np.array([bin(i).count('1') for i in range(0, 256)],
+                     dtype=np.uint8)
+
+
+class SharedCohort:
+    """
+    a cohort of graphs kept in shared memory, so that a pool of processes can
+    use it without copying, and only indices and results are sent between
+    processes.
+
+    the shared memory contains:
+    adjacency: N*n*ceil(n/8) uint8, the lower triangle of the adjacency matrix
+    of each graph, packed into bits (see numpy.packbits).
+    presence: N*ceil(n/8) uint8, nodes of each graph, packed into bits.
+    sizes: N*2 int64, number of nodes and number of edges of each graph.
+    matrices: N*n*n proximity matrices (only if the cohort is created by
+    "from_matrices" or "from_store").
+    vocabulary: key-terms (n) and names of graphs (N), as JSON.
+
+    shared memory is released by "close" (or at the end of a "with" block) of
+    the cohort which created it, e.g.,
+    with SharedCohort.from_graphs(graphs) as cohort:
+        s = cohort.calc_tversky([(0, 1), (0, 2)], 'propositional')
+        gcent = cohort.calc_gcent()
+
+    the shared memory needs Python 3.8 or later.
+    """
+
+    def __init__(self, keyterms, names, dtype=None):
+        """
+        create an empty cohort, which is filled by "from_graphs",
+        "from_matrices" or "from_store".
+
+        :param keyterms: a list of key-terms, i.e., all nodes of all graphs.
+        :param names: a list of names of graphs.
+        :param dtype: data type of proximity matrices. Default is None, which
+        means no proximity matrices.
+        """
+
+        # imported here, so that the other functions of the package work
+        # before Python 3.8
+        from multiprocessing.shared_memory import SharedMemory
+
+        N = len(names)
+        n = len(keyterms)
+        nb = (n + 7) // 8
+        vocabulary = json.dumps({'keyterms': list(keyterms),
+                                 'names': list(names)}).encode('utf-8')
+
+        layout = {'vocabulary': ([len(vocabulary)], 'u1'),
+                  'adjacency': ([N, n, nb], 'u1'),
+                  'presence': ([N, nb], 'u1'),
+                  'sizes': ([N, 2], '<i8')}
+        if dtype is not None:
+            layout['matrices'] = ([N, n, n], np.dtype(dtype).str)
+
+        spec = {}
+        self._shm = []
+        try:
+            for key, (shape, dt) in layout.items():
+                nbytes = int(np.prod(shape)) * np.dtype(dt).itemsize
+                # shared memory of 0 byte is not allowed
+                shm = SharedMemory(create=True, size=max(nbytes, 1))
+                self._shm.append(shm)
+                spec[key] = (shm.name, shape, dt)
+        except BaseException:
+            self._release(unlink=True)
+            raise
+
+        self._shm[0].buf[:len(vocabulary)] = vocabulary
+        self._open(spec, owner=True)
+        self.adjacency[:] = 0
+        self.presence[:] = 0
+        self.sizes[:] = 0
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        attach to a cohort created in another process, without copying.
+
+        :param spec: "cohort.spec" of the cohort.
+        :return: a SharedCohort. Closing it does not release the shared memory.
+        """
+
+        from multiprocessing.shared_memory import SharedMemory
+
+        cohort = cls.__new__(cls)
+        cohort._shm = []
+        for key, (name, shape, dt) in spec.items():
+            cohort._shm.append(SharedMemory(name=name))
+        cohort._open(spec, owner=False)
+
+        return cohort
+
+    def _open(self, spec, owner):
+        self.spec = spec
+        self.owner = owner
+
+        arrays = {}
+        for shm, (key, (name, shape, dt)) in zip(self._shm, spec.items()):
+            arrays[key] = np.ndarray(shape, dtype=dt, buffer=shm.buf)
+        self.vocabulary_buffer = arrays['vocabulary']
+        self.adjacency = arrays['adjacency']
+        self.presence = arrays['presence']
+        self.sizes = arrays['sizes']
+        self.matrices = arrays.get('matrices')
+
+        vocabulary = json.loads(self.vocabulary_buffer.tobytes().decode('utf-8'))
+        self.keyterms = vocabulary['keyterms']
+        self.names = vocabulary['names']
+        self._index = {term: i for i, term in enumerate(self.keyterms)}
+
+    @classmethod
+    def from_graphs(cls, graphs, keyterms=None):
+        """
+        create a cohort of graphs.
+
+        edges are undirected, and weights of edges are ignored.
+
+        :param graphs: a list of NetworkX graphs.
+        :param keyterms: a list of key-terms. Default is None, which means all
+        nodes of all graphs, sorted.
+        :return: a SharedCohort.
+        """
+
+        features = [graph_features(G) for G in graphs]
+        if keyterms is None:
+            keyterms = sorted(set().union(*[f[0] for f in features]))
+        names = [G.name if G.name else str(i) for i, G in enumerate(graphs)]
+
+        cohort = cls(keyterms, names)
+        try:
+            for i, (nodes, edges) in enumerate(features):
+                missing = nodes - cohort._index.keys()
+                assert not missing, \
+                    f'nodes {sorted(missing)} of graph "{names[i]}" are not ' \
+                    f'in key-terms'
+                links = np.zeros([len(keyterms), len(keyterms)], dtype=bool)
+                for u, v in edges:
+                    links[cohort._index[u], cohort._index[v]] = True
+                present = np.zeros(len(keyterms), dtype=bool)
+                present[[cohort._index[node] for node in nodes]] = True
+                cohort._set_graph(i, np.tril(links | links.T), present)
+        except BaseException:
+            cohort.close()
+            raise
+
+        return cohort
+
+    @classmethod
+    def from_matrices(
+            cls,
+            matrices,
+            keyterms,
+            names=None,
+            pfnet=False,
+            max=None,
+            min=None,
+            r=np.inf,
+            processes=None
+    ):
+        """
+        create a cohort of proximity/adjacency matrices, the graphs are the
+        same as "cmap2graph" with data_type="array".
+
+        :param matrices: N*n*n array (or a list of n*n arrays).
+        :param keyterms: a list of key-terms, i.e., rows and columns of every
+        matrix.
+        :param names: a list of names of graphs. Default is None, which means
+        "0", "1", ...
+        :param pfnet: see "cmap2graph".
+        :param max: see "cmap2graph".
+        :param min: see "cmap2graph".
+        :param r: see "cmap2graph".
+        :param processes: number of processes of calculating PFNet, see "map".
+        :return: a SharedCohort.
+        """
+
+        if names is None:
+            names = [str(i) for i in range(0, len(matrices))]
+        dtype = getattr(matrices, 'dtype', np.dtype('float64'))
+
+        cohort = cls(keyterms, names, dtype)
+        try:
+            for i in range(0, len(matrices)):
+                cohort.matrices[i] = matrices[i]
+            cohort.floyd(pfnet=pfnet, max=max, min=min, r=r,
+                         processes=processes)
+        except BaseException:
+            cohort.close()
+            raise
+
+        return cohort
+
+    @classmethod
+    def from_store(cls, store, pfnet=False, max=None, min=None, r=np.inf,
+                   processes=None):
+        """
+        create a cohort of all matrices in a PrxStore, see "from_matrices".
+        """
+
+        return cls.from_matrices(store.matrices, store.keyterms, store.names,
+                                 pfnet, max, min, r, processes)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _release(self, unlink):
+        for shm in self._shm:
+            if unlink:
+                shm.unlink()
+            try:
+                shm.close()
+            except BufferError:  # arrays of the shared memory are still used
+                pass
+        self._shm = []
+
+    def close(self):
+        """
+        stop using the shared memory. If the cohort is created in this process,
+        then the shared memory is released, and every process attached to it
+        should not use it anymore.
+
+        :return: None.
+        """
+
+        self.vocabulary_buffer = self.adjacency = self.presence = None
+        self.sizes = self.matrices = None
+        self._release(unlink=self.owner)
+
+    def _set_graph(self, i, links, present):
+        """
+        :param links: n*n bool array, lower triangle of the adjacency matrix.
+        :param present: bool array of nodes.
+        """
+
+        self.adjacency[i] = np.packbits(links, axis=-1)
+        self.presence[i] = np.packbits(present)
+        self.sizes[i] = [np.count_nonzero(present), np.count_nonzero(links)]
+
+    def links(self, i):
+        """
+        :return: n*n bool array, the lower triangle of the adjacency matrix of
+        graph i.
+        """
+
+        n = len(self.keyterms)
+        return np.unpackbits(self.adjacency[i], axis=-1, count=n).astype(bool)
+
+    def nodes(self, i):
+        """
+        :return: bool array of nodes of graph i.
+        """
+
+        n = len(self.keyterms)
+        return np.unpackbits(self.presence[i], count=n).astype(bool)
+
+    def graph(self, i):
+        """
+        :param i: index of the graph.
+        :return: a NetworkX graph.
+        """
+
+        G = nx.Graph()
+        G.name = self.names[i]
+        G.add_nodes_from(self.keyterms[k] for k in np.flatnonzero(self.nodes(i)))
+        start, end = np.nonzero(self.links(i))
+        G.add_edges_from((self.keyterms[u], self.keyterms[v])
+                         for u, v in zip(start, end))
+
+        return G
+
+    def map(self, func, tasks, processes=None, chunksize=1):
+        """
+        call func(cohort, task) for every task by a pool of processes. Each
+        process attaches to the cohort once, so only tasks and results are
+        sent between processes.
+
+        :param func: a function defined at the top level of a module (so that
+        it can be pickled), e.g.,
+        def edges_num(cohort, i):
+            return cohort.sizes[i, 1]
+        :param tasks: an iterable of tasks, e.g., indices of graphs.
+        :param processes: number of processes. Default is None, which means the
+        number of CPUs. If set as 1, then tasks are done in the current process.
+        :param chunksize: number of tasks sent to a process at a time.
+        :return: a generator of results, in the same order as "tasks".
+        """
+
+        if processes == 1:
+            for task in tasks:
+                yield func(self, task)
+            return
+
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(self.spec,)) as pool:
+            for result in pool.imap(_call, ((func, task) for task in tasks),
+                                    chunksize=chunksize):
+                yield result
+
+    def floyd(self, indices=None, pfnet=True, max=None, min=None, r=np.inf,
+              processes=None):
+        """
+        (re)calculate graphs from the proximity matrices, the same as
+        "cmap2graph" with data_type="array". Each process writes its graphs
+        into the shared memory directly.
+
+        :param indices: indices of graphs. Default is None, which means all.
+        :param pfnet: see "cmap2graph".
+        :param max: see "cmap2graph".
+        :param min: see "cmap2graph".
+        :param r: see "cmap2graph".
+        :param processes: see "map".
+        :return: None.
+        """
+
+        assert self.matrices is not None, 'the cohort has no proximity matrices'
+
+        if indices is None:
+            indices = range(0, len(self))
+        tasks = ((i, pfnet, max, min, r) for i in indices)
+        if not pfnet:
+            processes = 1  # nothing to calculate
+
+        for _ in self.map(_floyd_task, tasks, processes):
+            pass
+
+    def calc_tversky(
+            self,
+            pairs,
+            comparison,
+            alpha=0.5,
+            processes=None,
+            chunksize=1024
+    ):
+        """
+        calculate Tversky's similarity (see "calc_tversky") of many pairs of
+        graphs, graph i as graph1 and graph j as graph2.
+
+        a similarity is NaN if it can not be calculated, e.g., the propositional
+        similarity of two graphs without edges.
+
+        :param pairs: a list (or N*2 array) of (i, j), indices of graphs.
+        :param comparison: "concept", "propositional" or "semantic".
+        :param alpha: the parameter "alpha" in the Tversky's similarity.
+        :param processes: see "map".
+        :param chunksize: number of pairs calculated at a time.
+        :return: a NumPy array of similarities.
+        """
+
+        assert comparison in ['concept', 'propositional', 'semantic']
+
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        tasks = ((pairs[k:k + chunksize], comparison, alpha)
+                 for k in range(0, len(pairs), chunksize))
+
+        return np.concatenate(
+            [np.empty(0)] + list(self.map(_tversky_task, tasks, processes)))
+
+    def calc_gcent(self, indices=None, processes=None, chunksize=64):
+        """
+        calculate the gcent (see "calc_gcent") of graphs.
+
+        :param indices: indices of graphs. Default is None, which means all.
+        :param processes: see "map".
+        :param chunksize: number of graphs sent to a process at a time.
+        :return: a NumPy array of gcent, NaN if a graph has less than 3 nodes.
+        """
+
+        if indices is None:
+            indices = range(0, len(self))
+
+        return np.fromiter(self.map(_gcent_task, indices, processes, chunksize),
+                           dtype=float)
+
+
+# the cohort attached by each worker process, see "_init_worker"
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker['cohort'] = SharedCohort.attach(spec)
+
+
+def _call(task):
+    func, task = task
+    return func(_worker['cohort'], task)
+
+
+def _floyd_task(cohort, task):
+    i, pfnet, max, min, r = task
+
+    # the same as "_array2graph", but the shared matrix is not changed
+    array = cohort.matrices[i]
+    if pfnet:
+        if max is not None and min is not None:
+            array = _to_distance(array, max, min)
+        array = floyd(array, r=r)
+    links = np.tril(array) == True
+    cohort._set_graph(i, links, np.any(links, axis=0) | np.any(links, axis=1))
+
+    return i
+
+
+def _tversky_task(cohort, task):
+    pairs, comparison, alpha = task
+    i, j = pairs[:, 0], pairs[:, 1]
+    sizes = cohort.sizes.astype(float)
+
+    def common(bits):
+        bits = bits.reshape(len(bits), -1)
+        return _POPCOUNT[bits[i] & bits[j]].sum(axis=1, dtype=np.int64)
+
+    nodes = edges = None
+    if comparison in ['concept', 'semantic']:
+        nodes = (common(cohort.presence), sizes[i, 0], sizes[j, 0])
+    if comparison in ['propositional', 'semantic']:
+        edges = (common(cohort.adjacency), sizes[i, 1], sizes[j, 1])
+
+    concept, propositional, semantic = similarity_from_counts(nodes, edges,
+                                                              alpha)
+
+    return {'concept': concept, 'propositional': propositional,
+            'semantic': semantic}[comparison]
+
+
+def _gcent_task(cohort, i):
+    n = cohort.sizes[i, 0]
+    if n <= 2:
+        return np.nan
+
+    # see "calc_gcent", a self-loop adds 1 to the degree
+    links = cohort.links(i)
+    degree = links.sum(axis=0) + links.sum(axis=1) - links.diagonal()
+    ncent = degree[cohort.nodes(i)] / (n - 1)
+
+    return np.sum((np.max(ncent) - ncent) / (n - 2))
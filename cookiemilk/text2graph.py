@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 from re import finditer
-import sys
+import re
 import networkx as nx
+from multiprocessing import Pool, cpu_count
 from .pathfinder_network import *
+from .pathfinder_network import _infinity, _to_distance
 
 
 def text2graph(
@@ -18,7 +20,9 @@ def text2graph(
         pfnet=False,
         max=None,
         min=None,
-        r=np.inf
+        r=np.inf,
+        dtype='float64',
+        processes=1
 ):
     """
     Convert the text into a graph.
@@ -35,6 +39,14 @@ def text2graph(
     :param synonym: a dictionary. Each key is a term form key-terms list, and
     value can be a list contained synonym(s), e.g.,
     synonym={'a':['a1', 'a2'], 'b':['b1']}
+    synonyms are found together with key-terms in a single scan of the text
+    from left to right. A match starts at the leftmost position where any
+    key-term or synonym starts, if several of them start there, the longest one
+    is matched (e.g., "beeswax" rather than "bees"), and the scan continues
+    after the end of the match, so matches never overlap. Noted that a term
+    starting later is not found if it overlaps an earlier match, e.g., with
+    key-terms "honeybee", "beeswax" and "wax", the text "honeybeeswax" is
+    matched as "honeybee" and "wax".
     :param read_from_file: if True, then manipulate the "text" parameter as a
     string, if False, then manipulate the "text" parameter as a file path.
     :param encoding: default is "utf-8", which supports most languages, such as
@@ -53,9 +65,33 @@ def text2graph(
     see "Schvaneveldt, R. W., Durso, F. T., & Dearhold, D. W. (1989). Network
     structures in proximity data. Psychology of Learning and Motivation, 24,
     249-284".
+    :param dtype: data type of the proximity matrix and the PFNet calculation,
+    e.g., "float32" or "int8" (if "max" and "min" are integers), see "floyd".
+    Default is "float64".
+    :param processes: number of processes used to find key-terms in the text.
+    For a very large text (e.g., a book), the text is split into chunks and
+    scanned in parallel, the result is the same as scanning it in one process.
+    Default is 1. If None, then the number of CPUs.
     :return: a NetworkX graph represented the Knowledge Structure network.
     """
 
+    state = _compile_keyterms(keyterms, synonym)
+
+    return _text2graph_compiled(text, state, read_from_file, name, encoding,
+                                as_lower, pfnet, max, min, r, dtype,
+                                processes)
+
+
+def _compile_keyterms(keyterms, synonym=None):
+    """
+    check key-terms and synonyms, and compile them into a state which can be
+    reused for many texts.
+
+    :param keyterms: see "text2graph".
+    :param synonym: see "text2graph".
+    :return: a dict contained key-terms, synonyms and a compiled pattern.
+    """
+
     # ERROR information
     if synonym:
         try:
@@ -73,6 +109,63 @@ def text2graph(
                   'the value of each key must be a list object!\033[0m')
             exit(1)
 
+    # every surface form (a key-term or a synonym) --> index of the key-term
+    forms = {}
+    for i, e in enumerate(keyterms):
+        if type(e) is str:  # for signle term
+            forms.setdefault(e, i)
+        elif type(e) is list:  # for a sub-list contained synonyms
+            for t in e:
+                forms.setdefault(t, i)
+    if synonym:
+        try:
+            for key_term in synonym.keys():
+                assert key_term in forms
+        except:
+            print('\033[0;31m\nERROR: the "synonym" is unrecognized, '
+                  '"{}" is not a key-term!\033[0m'.format(key_term))
+            exit(1)
+
+        index = dict(forms)
+        for key_term in synonym.keys():  # for each key-term that has synonyms
+            for term in synonym[key_term]:  # for each synonym of the key-term
+                forms.setdefault(term, index[key_term])
+    forms.pop('', None)
+
+    # one pattern for all forms, longer forms first, so that among the forms
+    # starting at the same position of the text the longest one is matched
+    # (e.g., "beeswax" rather than "bees"), no matter the order of key-terms
+    # and synonyms, see "text2graph"
+    pattern = re.compile('|'.join(re.escape(t) for t in
+                                  sorted(forms, key=len, reverse=True)))
+
+    return {'keyterms': keyterms, 'synonym': synonym, 'forms': forms,
+            'pattern': pattern}
+
+
+def _text2graph_compiled(
+        text,
+        state,
+        read_from_file=True,
+        name=None,
+        encoding='utf-8',
+        as_lower=True,
+        pfnet=False,
+        max=None,
+        min=None,
+        r=np.inf,
+        dtype='float64',
+        processes=1
+):
+    """
+    convert the text into a graph, using a state from "_compile_keyterms".
+
+    see "text2graph" for parameters.
+    """
+
+    keyterms = state['keyterms']
+    synonym = state['synonym']
+
     G = nx.Graph()
     # add every nodes from key-terms list into the graph firstly, because some
     # participants' data may miss several key-terms or they only use some.
@@ -90,55 +183,30 @@ def text2graph(
                 file_text += line
         text = file_text
 
-    # error information
-    for i in keyterms:
-        for t in keyterms:
-            if i != t and i in t and keyterms.index(i) < keyterms.index(t):
-                print('\033[0;31m\nERROR!\n'
-                      '"{}" comes before "{}" in key terms list!\n'
-                      'this might conduct some error, \n'
-                      'because term "{}" in the text would be detected as term '
-                      '"{}".\n'
-                      'please re-order your terms list and insure "{}" after '
-                      '"{}".\033[0m'
-                      .format(i, t, i, t, i, t))
-                sys.exit(1)
-
     if as_lower:
         text = text.lower()
 
-    # synonyms replacement
-    if synonym:  # if there are synonyms need to replaced
-        for key_term in synonym.keys():  # for each key-term that has synonyms
-            for term in synonym[key_term]:  # for each synonym of the key-term
-                text = text.replace(term, key_term)  # find and replace it
-
-    chain = []
-    for e in keyterms:  # for each element in key-terms
-        if type(e) is str:  # for signle term
-            chain = text2chain(e, keyterms, text, chain)
-        elif type(e) is list:  # for a sub-list contained synonyms
-            for t in e:
-                chain = text2chain(t, keyterms, text, chain)
-
-    chain.sort()  # sort by order of occurrence
-    chain = list(x[1] for x in chain)  # keep index of terms only
+    # find key-terms and synonyms by order of occurrence, in a single scan
+    if processes == 1:
+        chain = _scan(text, state)
+    else:
+        chain = _scan_parallel(text, state, processes)
 
-    prx = np.zeros([len(keyterms), len(keyterms)])  # proximity data format
+    prx = np.zeros([len(keyterms), len(keyterms)], dtype=dtype)  # proximity data format
     for i in range(0, len(chain) - 1):
         prx[chain[i], chain[i + 1]] = 1
         prx[chain[i + 1], chain[i]] = 1
-        prx[chain[i], chain[i]] = None  # 对角线的元素赋值为NaN
 
     # Step 4: calculate PFNet (if necessary)
-    if pfnet:
+    if pfnet and max is not None and min is not None:
         # similarity --> distances (if necessary)
-        if max is not None and min is not None:
-            prx = max - prx + min
-            # the value that out of range would be set as inf
-            prx = np.where((prx > min) & (prx < max), prx, np.inf)
+        prx = _to_distance(prx, max, min, inplace=True)
+
+    # key-terms in the chain are not linked to themselves
+    prx[chain[:-1], chain[:-1]] = _infinity(prx.dtype)
 
-        prx = floyd(prx, r=r)
+    if pfnet:
+        prx = floyd(prx, r=r, inplace=True)
 
     # Step 5: convert it to a graph
     start, end = np.where(np.tril(prx) == True)
@@ -185,3 +253,107 @@ def text2chain(t, keyterms, text, chain, synonym=False):
                 chain.append([index.span(), keyterms.index(t)])
 
     return chain
+
+
+def _scan(text, state, pos=0, endpos=None):
+    """
+    find key-terms and synonyms in the text by a state from "_compile_keyterms".
+
+    :return: a list of index of key-terms, by order of occurrence.
+    """
+
+    if endpos is None:
+        endpos = len(text)
+    forms = state['forms']
+
+    if not forms:
+        return []
+
+    return [forms[match.group()]
+            for match in state['pattern'].finditer(text, pos, endpos)]
+
+
+def _scan_parallel(text, state, processes=None, chunk_size=None):
+    """
+    the same as "_scan", but the text is split into chunks and scanned by a
+    pool of processes.
+
+    each chunk is scanned a bit further than its end (the length of the
+    longest key-term), so that a term across the edge of chunks is found. Then
+    chunks are stitched in order, if the last term of a chunk runs into the next
+    chunk, then the next chunk is scanned again from the end of that term until
+    it meets a term found by the chunk, from where the results are the same.
+
+    :return: a list of index of key-terms, by order of occurrence.
+    """
+
+    forms = state['forms']
+    if not forms:
+        return []
+    overlap = max(len(t) for t in forms)
+
+    if processes is None:
+        processes = cpu_count()
+    if chunk_size is None:
+        chunk_size = len(text) // (processes * 4) + 1
+        if chunk_size < 1 << 16:
+            chunk_size = 1 << 16
+
+    bounds = [(start, start + chunk_size if start + chunk_size < len(text)
+               else len(text)) for start in range(0, len(text), chunk_size)]
+    if len(bounds) < 2:
+        return _scan(text, state)
+
+    tasks = [(text[start:end + overlap], start, end - start)
+             for start, end in bounds]
+    with Pool(processes, initializer=_init_scan, initargs=(state,)) as pool:
+        results = pool.map(_scan_chunk, tasks)
+
+    pattern = state['pattern']
+    chain = []
+    last_end = 0
+    for (start, end), matches in zip(bounds, results):
+        j = 0
+        if last_end > start:
+            # the last term runs into this chunk, scan again until synced
+            synced = False
+            for match in pattern.finditer(text, last_end):
+                if match.start() >= end:
+                    break
+                while j < len(matches) and matches[j][0] < match.start():
+                    j += 1
+                if j < len(matches) and matches[j][0] == match.start():
+                    synced = True
+                    break
+                chain.append(forms[match.group()])
+                last_end = match.end()
+            if not synced:
+                j = len(matches)
+        for match_start, match_end, index in matches[j:]:
+            chain.append(index)
+            last_end = match_end
+
+    return chain
+
+
+# compiled key-terms of each worker process, see "_scan_parallel"
+_scan_state = None
+
+
+def _init_scan(state):
+    global _scan_state
+    _scan_state = state
+
+
+def _scan_chunk(task):
+    text, offset, end = task
+    forms = _scan_state['forms']
+
+    matches = []
+    for match in _scan_state['pattern'].finditer(text):
+        if match.start() >= end:
+            break
+        matches.append((match.start() + offset, match.end() + offset,
+                        forms[match.group()]))
+
+    return matches
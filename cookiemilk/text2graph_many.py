@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Pool
+from .text2graph import *
+from .text2graph import _compile_keyterms, _text2graph_compiled
+
+# compiled key-terms and settings of each worker process, see "_init_worker"
+_worker_state = None
+_worker_kwargs = None
+
+
+def text2graph_many(
+        texts,
+        keyterms,
+        synonym=None,
+        processes=None,
+        chunksize=1,
+        **kwargs
+):
+    """
+    convert many texts into graphs by a pool of processes.
+
+    key-terms and synonyms are checked and compiled only once in each process,
+    rather than once for each text.
+
+    :param texts: an iterable (e.g., a list or a generator) of strings or file
+    paths of .txt documents, see "text2graph".
+    :param keyterms: a list contained some string variables, each string is one
+    key-term, see "text2graph".
+    :param synonym: a dictionary of synonyms, see "text2graph".
+    :param processes: number of processes. Default is None, which means the
+    number of CPUs. If set as 1, then texts are converted in the current process.
+    :param chunksize: number of texts sent to a process at a time. Large
+    "chunksize" is faster when there are a lot of short texts.
+    :param kwargs: other parameters of "text2graph", e.g., read_from_file,
+    encoding, as_lower, pfnet, max, min, r.
+    :return: a generator of NetworkX graphs, in the same order as "texts".
+    """
+
+    # check key-terms in the current process first, so that errors are shown
+    # before any process is started
+    state = _compile_keyterms(keyterms, synonym)
+
+    if processes == 1:
+        for text in texts:
+            yield _text2graph_compiled(text, state, **kwargs)
+        return
+
+    with Pool(processes, initializer=_init_worker,
+              initargs=(keyterms, synonym, kwargs)) as pool:
+        for G in pool.imap(_convert, texts, chunksize=chunksize):
+            yield G
+
+
+def _init_worker(keyterms, synonym, kwargs):
+    global _worker_state, _worker_kwargs
+    _worker_state = _compile_keyterms(keyterms, synonym)
+    _worker_kwargs = kwargs
+
+
+def _convert(text):
+    return _text2graph_compiled(text, _worker_state, **_worker_kwargs)
@@ -15,5 +15,6 @@ setuptools.setup(
     include_package_data=True,
     python_requires=">=3.6",
     install_requires=['numpy', 'pywebview', 'networkx'],
-    packages=setuptools.find_packages(include=['d3v3', 'example', 'cookimilk'])
+    packages=setuptools.find_packages(include=['d3v3', 'example', 'cookiemilk']),
+    entry_points={'console_scripts': ['cookiemilk=cookiemilk.cli:main']}
 )